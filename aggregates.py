@@ -0,0 +1,486 @@
+"""Materialized aggregate store for the dashboard.
+
+Everything the dashboard renders is derived from the raw postings once per
+dataset version by ``build_aggregates``. Streamlit reruns only slice the
+frames held by the resulting ``AggregateStore``. The store is built from
+mergeable partial sums (``partial_aggregates``/``merge_partials``), so it
+can also be assembled from chunks of a file that does not fit in memory.
+"""
+import json
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from categories import UNKNOWN_SECTOR, explode_categories, primary_categories
+from classify import TECH_KEYWORDS, tech_title_mask
+from day_matrix import DayMatrix, day_key_sums
+from diagnostics import stage
+from quantile_sketch import bucket_index, grouped_quantiles
+
+# Salary quantiles available per sector and date window
+SALARY_QUANTILES = (0.25, 0.5, 0.75, 0.9)
+
+
+# Columns carried into tech_df (categories becomes categorical); the original
+# posting date is only needed to derive posting_recency
+TECH_COLUMNS = ['metadata_jobPostId', 'metadata_newPostingDate', 'metadata_repostCount',
+                'numberOfVacancies', 'postedCompany_name', 'salary_minimum', 'salary_maximum', 'title']
+
+
+def prepare_tech_jobs(df, keywords=TECH_KEYWORDS):
+    """Filter the postings down to dated tech jobs with recency and Sector columns.
+
+    The rows are selected with one combined mask and each needed column is
+    taken once, instead of copying the whole frame at every filter step.
+    """
+    # Tech titles (each distinct title is classified once) with a valid posting date
+    with stage('classify_titles', rows=len(df)):
+        keep = np.asarray(tech_title_mask(df['title'], keywords)) & df['metadata_newPostingDate'].notna().to_numpy()
+    with stage('select_tech_rows') as record:
+        tech_df = pd.DataFrame({col: df[col][keep] for col in TECH_COLUMNS if col in df.columns})
+        record.rows = len(tech_df)
+
+    # Calculate posting recency for sector analysis
+    recency = tech_df['metadata_newPostingDate'] - df['metadata_originalPostingDate'][keep]
+    tech_df['posting_recency'] = recency.dt.days.astype('float32')
+
+    # Sector is the first category of each posting; each distinct string is parsed once
+    with stage('parse_categories', rows=len(tech_df)):
+        if 'categories' in df.columns:
+            tech_df['categories'] = df['categories'][keep].astype('category')
+        else:
+            tech_df['categories'] = pd.Categorical([None] * len(tech_df))
+        tech_df['Sector'] = primary_categories(tech_df['categories'])
+    return tech_df
+
+
+def category_table(tech_df):
+    """The exploded (job_id, category) table of ``tech_df``, one row per listed category."""
+    return explode_categories(tech_df['categories'], tech_df['metadata_jobPostId'])
+
+
+def _f64(series):
+    # Columns are stored as float32; sums are accumulated in float64
+    return series.fillna(0).astype('float64')
+
+
+def _daily_totals(tech_df):
+    """Per-day counts and sums; every time series and Quick Stats figure derives from these."""
+    salary_mask = tech_df['salary_minimum'].notna() & tech_df['salary_maximum'].notna()
+    totals = pd.DataFrame({
+        'rows': 1,
+        'postings': tech_df['metadata_jobPostId'].notna(),
+        'vacancies': _f64(tech_df['numberOfVacancies']),
+        'salary_n': salary_mask,
+        'salary_min_sum': _f64(tech_df['salary_minimum'].where(salary_mask)),
+        'salary_max_sum': _f64(tech_df['salary_maximum'].where(salary_mask)),
+        'repost_n': tech_df['metadata_repostCount'].notna(),
+        'repost_sum': _f64(tech_df['metadata_repostCount']),
+        'recency_n': tech_df['posting_recency'].notna(),
+        'recency_sum': _f64(tech_df['posting_recency']),
+    })
+    totals.index = pd.DatetimeIndex(tech_df['metadata_newPostingDate'].dt.normalize(), name='Date')
+    return totals.groupby(level='Date').sum().sort_index()
+
+
+def _mean(total, count):
+    return (total / count).where(count > 0)
+
+
+def _timeseries(daily_totals):
+    """Merge the per-day dashboard series into one frame with a sorted DatetimeIndex."""
+    return pd.DataFrame({
+        'Total Postings': daily_totals['postings'],
+        'Total Vacancies': daily_totals['vacancies'],
+        'salary_minimum': _mean(daily_totals['salary_min_sum'], daily_totals['salary_n']),
+        'salary_maximum': _mean(daily_totals['salary_max_sum'], daily_totals['salary_n']),
+        'Average Repost Count': _mean(daily_totals['repost_sum'], daily_totals['repost_n']),
+        # Days between original and new posting date
+        'Average Posting Recency': _mean(daily_totals['recency_sum'], daily_totals['recency_n']),
+    }, index=daily_totals.index)
+
+
+def _company_sums(tech_df):
+    # Postings per company per day
+    day = tech_df['metadata_newPostingDate'].dt.normalize()
+    return day_key_sums(day, tech_df['postedCompany_name'], {
+        'postings': tech_df['metadata_jobPostId'].notna().astype('int64'),
+    })
+
+
+def _title_sums(tech_df):
+    # Postings and salary sums per title per day; means are taken over each window
+    day = tech_df['metadata_newPostingDate'].dt.normalize()
+    return day_key_sums(day, tech_df['title'], {
+        'postings': tech_df['metadata_jobPostId'].notna().astype('int64'),
+        'salary_min_n': tech_df['salary_minimum'].notna().astype('int64'),
+        'salary_min_sum': _f64(tech_df['salary_minimum']),
+        'salary_max_n': tech_df['salary_maximum'].notna().astype('int64'),
+        'salary_max_sum': _f64(tech_df['salary_maximum']),
+    })
+
+
+def _sector_sums(tech_df):
+    # Postings and posting-recency sums per sector per day
+    day = tech_df['metadata_newPostingDate'].dt.normalize()
+    return day_key_sums(day, tech_df['Sector'], {
+        'rows': np.ones(len(tech_df), dtype='int64'),
+        'postings': tech_df['metadata_jobPostId'].notna().astype('int64'),
+        'recency_n': tech_df['posting_recency'].notna().astype('int64'),
+        'recency_sum': _f64(tech_df['posting_recency']),
+    })
+
+
+def _category_sums(tech_df):
+    # Postings per category per day, counting every category listed on a posting once;
+    # postings without a valid category count as 'Unknown', as in the Sector column
+    table = category_table(tech_df).drop_duplicates(['row', 'category'])
+    categories = table['category'].cat.categories
+    if UNKNOWN_SECTOR not in categories:
+        categories = categories.append(pd.Index([UNKNOWN_SECTOR]))
+    unlisted = np.setdiff1d(np.arange(len(tech_df), dtype=np.int32), table['row'].to_numpy())
+    rows = np.concatenate([table['row'].to_numpy(), unlisted])
+    codes = np.concatenate([table['category'].cat.codes.to_numpy(dtype=np.int32),
+                            np.full(len(unlisted), categories.get_loc(UNKNOWN_SECTOR), dtype=np.int32)])
+    day = tech_df['metadata_newPostingDate'].dt.normalize().to_numpy()[rows]
+    return day_key_sums(day, pd.Categorical.from_codes(codes, categories), {
+        'rows': np.ones(len(rows), dtype='int64'),
+        'postings': tech_df['metadata_jobPostId'].notna().to_numpy()[rows].astype('int64'),
+    })
+
+
+def _sector_title_sums(tech_df):
+    # Postings per (sector, title) per day, for the dominant roles table
+    day = tech_df['metadata_newPostingDate'].dt.normalize()
+    return day_key_sums(day, [tech_df['Sector'], tech_df['title']], {
+        'postings': tech_df['metadata_jobPostId'].notna().astype('int64'),
+    })
+
+
+def _salary_sketch_sums(tech_df, column):
+    # Log-bucket counts of one salary column per (sector, bucket) per day
+    present = tech_df[column].notna()
+    day = tech_df.loc[present, 'metadata_newPostingDate'].dt.normalize()
+    buckets = bucket_index(tech_df.loc[present, column])
+    return day_key_sums(day, [tech_df.loc[present, 'Sector'], buckets], {
+        'count': np.ones(int(present.sum()), dtype='int64'),
+    })
+
+
+def _available_sectors(sectors):
+    # Sorted sectors with 'Unknown' last (or alone if it is the only one)
+    available_sectors = sorted([s for s in sectors if s != 'Unknown'])
+    if not available_sectors:
+        available_sectors = ['Unknown']
+    elif 'Unknown' in sectors:
+        available_sectors.append('Unknown')
+    return available_sectors
+
+
+# Name and builder of every partial aggregate, in build order
+PARTIAL_AGGREGATES = {
+    'daily': _daily_totals,
+    'company': _company_sums,
+    'title': _title_sums,
+    'sector': _sector_sums,
+    'category': _category_sums,
+    'sector_title': _sector_title_sums,
+    'salary_min_sketch': lambda tech_df: _salary_sketch_sums(tech_df, 'salary_minimum'),
+    'salary_max_sketch': lambda tech_df: _salary_sketch_sums(tech_df, 'salary_maximum'),
+}
+
+
+def partial_aggregates(tech_df):
+    """Mergeable per-day sums behind every dashboard figure.
+
+    Every entry is a frame of counts and sums indexed by day (and a key), so
+    partials built from separate chunks, files or workers combine exactly by
+    addition with ``merge_partials``. Means are only taken at query time.
+    """
+    partials = {}
+    for name, build in PARTIAL_AGGREGATES.items():
+        with stage(f'aggregate.{name}') as record:
+            partials[name] = build(tech_df)
+            record.rows = len(partials[name])
+    return partials
+
+
+def merge_sums(frames):
+    """Add up sums frames, combining rows with the same (day, key) index."""
+    frame = pd.concat([frame for frame in frames if frame is not None])
+    return frame.groupby(level=list(range(frame.index.nlevels)), sort=False).sum()
+
+
+def merge_partials(partials):
+    """Combine partial aggregates by adding the sums of matching (day, key) rows."""
+    partials = [partial for partial in partials if partial is not None]
+    return {name: merge_sums([partial[name] for partial in partials]) for name in partials[0]}
+
+
+@dataclass
+class AggregateStore:
+    """Every frame the dashboard renders, computed once per dataset version.
+
+    ``timeseries`` holds all per-day series on one sorted DatetimeIndex, so
+    a date window is located with two binary searches. Window totals (Quick
+    Stats) come from prefix sums over ``daily_totals``, so any date range is
+    answered in O(log n) without scanning the days inside it. Company,
+    title and sector figures for a window come from ``DayMatrix`` sums.
+    Sector salary quantiles merge the per-(sector, day) log-bucket sketches
+    of ``quantile_sketch``, which stay within 1% of the exact values.
+    """
+    daily_totals: pd.DataFrame
+    timeseries: pd.DataFrame
+    company_matrix: DayMatrix
+    title_matrix: DayMatrix
+    sector_matrix: DayMatrix
+    category_matrix: DayMatrix
+    sector_title_matrix: DayMatrix
+    salary_min_sketch: DayMatrix
+    salary_max_sketch: DayMatrix
+    available_sectors: list
+    prefix_sums: dict = field(init=False, repr=False)
+
+    MATRICES = ('company_matrix', 'title_matrix', 'sector_matrix', 'category_matrix', 'sector_title_matrix',
+                'salary_min_sketch', 'salary_max_sketch')
+
+    def __post_init__(self):
+        # Leading zero so the total over positions [i, j) is prefix[j] - prefix[i]
+        self.prefix_sums = {
+            col: np.concatenate(([0], np.cumsum(self.daily_totals[col].to_numpy(dtype='float64'))))
+            for col in self.daily_totals.columns
+        }
+
+    def save(self, directory):
+        """Write the store to a directory that ``load`` can memory-map."""
+        os.makedirs(directory, exist_ok=True)
+        self.daily_totals.to_parquet(os.path.join(directory, 'daily_totals.parquet'))
+        for name in self.MATRICES:
+            getattr(self, name).save(os.path.join(directory, name))
+        with open(os.path.join(directory, 'available_sectors.json'), 'w') as f:
+            json.dump(self.available_sectors, f)
+
+    def memory_usage(self):
+        """Bytes held by each part of the store."""
+        usage = {name: frame.memory_usage(deep=True).sum()
+                 for name, frame in (('daily_totals', self.daily_totals), ('timeseries', self.timeseries))}
+        usage['prefix_sums'] = sum(array.nbytes for array in self.prefix_sums.values())
+        usage.update((name, getattr(self, name).nbytes) for name in self.MATRICES)
+        return pd.Series(usage, dtype='int64')
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Read a store written by ``save``, memory-mapping the matrix arrays."""
+        daily_totals = pd.read_parquet(os.path.join(directory, 'daily_totals.parquet'))
+        days = daily_totals.index
+        with open(os.path.join(directory, 'available_sectors.json')) as f:
+            available_sectors = json.load(f)
+        matrices = {name: DayMatrix.load(os.path.join(directory, name), days, mmap_mode)
+                    for name in cls.MATRICES}
+        return cls(daily_totals=daily_totals, timeseries=_timeseries(daily_totals),
+                   available_sectors=available_sectors, **matrices)
+
+    @property
+    def min_date(self):
+        return self.timeseries.index[0]
+
+    @property
+    def max_date(self):
+        return self.timeseries.index[-1]
+
+    def date_positions(self, start, end):
+        """Return positions ``[i, j)`` of the days between start and end (inclusive)."""
+        index = self.timeseries.index
+        return index.searchsorted(pd.Timestamp(start), side='left'), index.searchsorted(pd.Timestamp(end), side='right')
+
+    def timeseries_window(self, start, end, freq='D'):
+        """Rows of ``timeseries`` between start and end, as a positional slice.
+
+        With a coarser ``freq`` (a pandas resampling rule such as ``'W-MON'``
+        or ``'MS'``) the daily totals in the window are summed per period
+        first, so the period averages are exact. Periods without postings are
+        left out, as days without postings are.
+        """
+        i, j = self.date_positions(start, end)
+        if freq == 'D':
+            return self.timeseries.iloc[i:j]
+        totals = self.daily_totals.iloc[i:j].resample(freq, label='left', closed='left').sum()
+        return _timeseries(totals[totals['rows'] > 0])
+
+    def window_totals(self, start, end):
+        """Sum of every ``daily_totals`` column between start and end."""
+        i, j = self.date_positions(start, end)
+        return {col: prefix[j] - prefix[i] for col, prefix in self.prefix_sums.items()}
+
+    def quick_stats(self, start, end):
+        """Total tech jobs, average salary and total vacancies for a date window."""
+        totals = self.window_totals(start, end)
+        if totals['salary_n'] > 0:
+            avg_salary = (totals['salary_min_sum'] + totals['salary_max_sum']) / totals['salary_n'] / 2
+        else:
+            avg_salary = None
+        return {
+            'total_tech_jobs': int(totals['rows']),
+            'avg_salary': avg_salary,
+            'total_vacancies': totals['vacancies'],
+        }
+
+    def company_ranking(self, start, end, n):
+        """Top ``n`` companies by tech postings between start and end."""
+        totals = self.company_matrix.window(*self.date_positions(start, end))
+        top = self.company_matrix.top(totals, n, by='postings')
+        return pd.DataFrame({
+            'Company': self.company_matrix.keys[top],
+            'Job Count': totals['postings'][top].astype('int64'),
+        })
+
+    def title_ranking(self, start, end, n):
+        """Top ``n`` tech job titles by postings between start and end, with average salaries."""
+        totals = self.title_matrix.window(*self.date_positions(start, end))
+        top = self.title_matrix.top(totals, n, by='postings')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg_min = totals['salary_min_sum'][top] / totals['salary_min_n'][top]
+            avg_max = totals['salary_max_sum'][top] / totals['salary_max_n'][top]
+        return pd.DataFrame({
+            'Tech Job Title': self.title_matrix.keys[top],
+            'Count': totals['postings'][top].astype('int64'),
+            'Avg_Min_Salary': avg_min,
+            'Avg_Max_Salary': avg_max,
+            'Average_Salary': (avg_min + avg_max) / 2,
+        })
+
+    def sector_postings(self, start, end):
+        """Tech postings per sector between start and end."""
+        totals = self.sector_matrix.window(*self.date_positions(start, end))
+        present = totals['rows'] > 0
+        return pd.DataFrame({
+            'Sector': self.sector_matrix.keys[present],
+            'Total Postings': totals['postings'][present].astype('int64'),
+        })
+
+    def category_postings(self, start, end):
+        """Tech postings per category between start and end, counting every category on a posting.
+
+        A posting listed under several categories counts once in each of
+        them, so the totals add up to more than the number of postings.
+        """
+        totals = self.category_matrix.window(*self.date_positions(start, end))
+        present = totals['rows'] > 0
+        return pd.DataFrame({
+            'Sector': self.category_matrix.keys[present],
+            'Total Postings': totals['postings'][present].astype('int64'),
+        })
+
+    def sector_growth_trend(self, start, end):
+        """Average posting age (recency) per sector between start and end."""
+        totals = self.sector_matrix.window(*self.date_positions(start, end))
+        present = totals['recency_n'] > 0
+        return pd.DataFrame({
+            'Sector': self.sector_matrix.keys[present],
+            'Average Posting Age': totals['recency_sum'][present] / totals['recency_n'][present],
+        })
+
+    def dominant_roles(self, sector, start, end, n=5):
+        """The ``n`` most posted titles in one sector between start and end."""
+        keys = self.sector_title_matrix.keys
+        if sector not in keys.levels[0]:
+            return pd.DataFrame({'Sector': [], 'Job Title': [], 'Count': []})
+        # Keys are sorted by sector, so one sector's titles are a contiguous block
+        block = keys.get_loc(sector)
+        totals = self.sector_title_matrix.window(*self.date_positions(start, end), columns=['postings'])
+        postings = totals['postings'][block]
+        top = self.sector_title_matrix.top({'postings': postings}, n, by='postings')
+        return pd.DataFrame({
+            'Sector': sector,
+            'Job Title': keys.get_level_values(1)[block][top],
+            'Count': postings[top].astype('int64'),
+        })
+
+    def _sketch_quantiles(self, sketch, i, j, quantiles):
+        counts = sketch.window(i, j)['count']
+        sector_codes, sectors = pd.factorize(sketch.keys.get_level_values(0))
+        buckets = sketch.keys.get_level_values(1).to_numpy(dtype='int64')
+        values = grouped_quantiles(sector_codes, buckets, counts, len(sectors), quantiles)
+        return pd.DataFrame(values, index=sectors, columns=list(quantiles))
+
+    def sector_salary_quantiles(self, start, end, quantiles=SALARY_QUANTILES):
+        """Salary quantiles per sector between start and end, merged from the sketches.
+
+        Columns are ``(column, quantile)`` pairs, e.g. ``('salary_minimum', 0.5)``.
+        Each value is within 1% of the exact pandas quantile on the same rows.
+        """
+        i, j = self.date_positions(start, end)
+        frame = pd.concat({
+            'salary_minimum': self._sketch_quantiles(self.salary_min_sketch, i, j, quantiles),
+            'salary_maximum': self._sketch_quantiles(self.salary_max_sketch, i, j, quantiles),
+        }, axis=1)
+        frame.index.name = 'Sector'
+        return frame
+
+    def sector_median_salary(self, start, end):
+        """Median salary per sector between start and end (mean of the min and max medians)."""
+        present = self.sector_postings(start, end)['Sector']
+        medians = self.sector_salary_quantiles(start, end, quantiles=(0.5,)).reindex(present)
+        return pd.DataFrame({
+            'Sector': present.to_numpy(),
+            'Median Salary': ((medians[('salary_minimum', 0.5)] + medians[('salary_maximum', 0.5)]) / 2).to_numpy(),
+        })
+
+
+# Partial aggregate behind each DayMatrix of the store
+MATRIX_PARTIALS = {
+    'company_matrix': 'company',
+    'title_matrix': 'title',
+    'sector_matrix': 'sector',
+    'category_matrix': 'category',
+    'sector_title_matrix': 'sector_title',
+    'salary_min_sketch': 'salary_min_sketch',
+    'salary_max_sketch': 'salary_max_sketch',
+}
+
+
+def _store(daily_totals, matrices):
+    return AggregateStore(
+        daily_totals=daily_totals,
+        timeseries=_timeseries(daily_totals),
+        available_sectors=_available_sectors(list(matrices['sector_matrix'].keys)),
+        **matrices,
+    )
+
+
+def store_from_partials(partials):
+    """Build the ``AggregateStore`` from (merged) partial aggregates."""
+    daily_totals = partials['daily'].sort_index()
+    days = daily_totals.index
+    return _store(daily_totals, {attr: DayMatrix.from_sums(partials[name], days)
+                                 for attr, name in MATRIX_PARTIALS.items()})
+
+
+def extend_store(store, partials):
+    """``store`` plus the partial aggregates of days after its last one.
+
+    The CSR rows of every matrix are extended rather than rebuilt, so the
+    cost depends on the new partials. Returns None if the partials touch a
+    day the store already has; such a store must be rebuilt with
+    ``store_from_partials``.
+    """
+    new_totals = partials['daily'].sort_index()
+    if new_totals.empty:
+        return store
+    if new_totals.index[0] <= store.max_date:
+        return None
+    daily_totals = pd.concat([store.daily_totals, new_totals])
+    days = daily_totals.index
+    return _store(daily_totals, {attr: getattr(store, attr).extend(partials[name], days)
+                                 for attr, name in MATRIX_PARTIALS.items()})
+
+
+def build_aggregates(df, keywords=TECH_KEYWORDS):
+    """Derive every dashboard frame from the raw postings."""
+    with stage('prepare_tech_jobs', rows=len(df)):
+        tech_df = prepare_tech_jobs(df, keywords)
+    partials = partial_aggregates(tech_df)
+    with stage('store_from_partials'):
+        return store_from_partials(partials)
@@ -1,10 +1,14 @@
+import functools
 import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime
-import pandas as pd
-import numpy as np
-import ast
+from charts import GRANULARITIES, downsample, granularity, render_mode, scatter_trace
+from classify import load_tech_keywords
+from diagnostics import DIAGNOSTICS, Recorder, current, profiling_allowed, stage
+from pipeline import current_version, load_store
+from reloader import Reloader
+from result_cache import ResultCache
 
 # Configure page layout for better space utilization
 st.set_page_config(
@@ -38,446 +42,499 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-# Load the CSV data
-@st.cache_data
-def load_data():
-    df = pd.read_csv('SGJobData.csv')
-    df['metadata_newPostingDate'] = pd.to_datetime(df['metadata_newPostingDate'], errors='coerce')
-    df['metadata_originalPostingDate'] = pd.to_datetime(df['metadata_originalPostingDate'], errors='coerce')
-    return df
-
-df = load_data()
-
-# Define tech-related keywords
-tech_keywords = ['software', 'developer', 'engineer', 'programmer', 'data scientist', 'analyst', 
-                 'architect', 'devops', 'backend', 'frontend', 'fullstack', 'full stack',
-                 'machine learning', 'ai', 'artificial intelligence', 'cyber', 'security',
-                 'cloud', 'database', 'sql', 'python', 'java', 'javascript', 'tech', 'it',
-                 'information technology', 'system', 'network', 'infrastructure']
-
-# Filter for tech jobs
-def is_tech_job(title):
-    if pd.isna(title):
-        return False
-    title_lower = str(title).lower()
-    return any(keyword in title_lower for keyword in tech_keywords)
-
-tech_mask = df['title'].apply(is_tech_job)
-tech_df = df[tech_mask].copy()
-
-# Remove rows with invalid dates
-tech_df = tech_df[tech_df['metadata_newPostingDate'].notna()].copy()
-
-# Calculate posting recency for sector analysis
-tech_df['posting_recency'] = (tech_df['metadata_newPostingDate'] - tech_df['metadata_originalPostingDate']).dt.days
-
-# Create daily_metrics
-daily_metrics = tech_df.groupby(tech_df['metadata_newPostingDate'].dt.date).agg({
-    'metadata_jobPostId': 'count',
-    'numberOfVacancies': lambda x: x.fillna(0).sum()
-}).reset_index()
-daily_metrics.columns = ['Date', 'Total Postings', 'Total Vacancies']
-daily_metrics['Date'] = pd.to_datetime(daily_metrics['Date'])
-daily_metrics = daily_metrics.dropna(subset=['Date'])
-
-# Create salary_over_time
-salary_df = tech_df[tech_df['salary_minimum'].notna() & tech_df['salary_maximum'].notna()].copy()
-salary_over_time = salary_df.groupby(salary_df['metadata_newPostingDate'].dt.date).agg({
-    'salary_minimum': 'mean',
-    'salary_maximum': 'mean'
-}).reset_index()
-salary_over_time.columns = ['metadata_newPostingDate', 'salary_minimum', 'salary_maximum']
-salary_over_time['metadata_newPostingDate'] = pd.to_datetime(salary_over_time['metadata_newPostingDate'])
-salary_over_time = salary_over_time.dropna(subset=['metadata_newPostingDate'])
-
-# Create average_repost_over_time
-repost_df = tech_df[tech_df['metadata_repostCount'].notna()].copy()
-average_repost_over_time = repost_df.groupby(repost_df['metadata_newPostingDate'].dt.date).agg({
-    'metadata_repostCount': 'mean'
-}).reset_index()
-average_repost_over_time.columns = ['Date', 'Average Repost Count']
-average_repost_over_time['Date'] = pd.to_datetime(average_repost_over_time['Date'])
-average_repost_over_time = average_repost_over_time.dropna(subset=['Date'])
-
-# Create average_recency_over_time (days between original and new posting date)
-recency_df = tech_df[tech_df['posting_recency'].notna()].copy()
-average_recency_over_time = recency_df.groupby(recency_df['metadata_newPostingDate'].dt.date).agg({
-    'posting_recency': 'mean'
-}).reset_index()
-average_recency_over_time.columns = ['Date', 'Average Posting Recency']
-average_recency_over_time['Date'] = pd.to_datetime(average_recency_over_time['Date'])
-average_recency_over_time = average_recency_over_time.dropna(subset=['Date'])
-
-# Create company_tech_job_counts
-company_tech_job_counts = tech_df.groupby('postedCompany_name').agg({
-    'metadata_jobPostId': 'count'
-}).reset_index()
-company_tech_job_counts.columns = ['Company', 'Job Count']
-company_tech_job_counts = company_tech_job_counts.sort_values('Job Count', ascending=False).reset_index(drop=True)
-
-# Create tech_job_salary_summary
-tech_job_salary_summary = tech_df.groupby('title').agg({
-    'metadata_jobPostId': 'count',
-    'salary_minimum': 'mean',
-    'salary_maximum': 'mean'
-}).reset_index()
-tech_job_salary_summary['Average_Salary'] = (tech_job_salary_summary['salary_minimum'] + tech_job_salary_summary['salary_maximum']) / 2
-tech_job_salary_summary.columns = ['Tech Job Title', 'Count', 'Avg_Min_Salary', 'Avg_Max_Salary', 'Average_Salary']
-tech_job_salary_summary = tech_job_salary_summary.sort_values('Count', ascending=False).reset_index(drop=True)
-
-# Extract sector from categories by parsing JSON
-def extract_first_category(categories_str):
-    """Extract the first category name from JSON string."""
-    if pd.isna(categories_str) or categories_str == '':
-        return 'Unknown'
-    try:
-        # Parse the JSON string (it's stored as a string representation of a list)
-        categories_list = ast.literal_eval(str(categories_str))
-        if isinstance(categories_list, list) and len(categories_list) > 0:
-            # Get the first category name
-            if isinstance(categories_list[0], dict) and 'category' in categories_list[0]:
-                return categories_list[0]['category']
-        return 'Unknown'
-    except (ValueError, SyntaxError, TypeError, KeyError, IndexError):
-        # If parsing fails, return Unknown
-        return 'Unknown'
-
-if 'categories' in tech_df.columns:
-    # Extract readable category names from JSON
-    tech_df['Sector'] = tech_df['categories'].apply(extract_first_category)
-else:
-    tech_df['Sector'] = 'Unknown'
-
-# Create dominant_roles_per_sector
-dominant_roles_per_sector = tech_df.groupby(['Sector', 'title']).agg({
-    'metadata_jobPostId': 'count'
-}).reset_index()
-dominant_roles_per_sector.columns = ['Sector', 'Job Title', 'Count']
-dominant_roles_per_sector = dominant_roles_per_sector.sort_values(['Sector', 'Count'], ascending=[True, False])
-dominant_roles_per_sector = dominant_roles_per_sector.groupby('Sector').head(5).reset_index(drop=True)
-
-# Create sector_postings
-sector_postings = tech_df.groupby('Sector').agg({
-    'metadata_jobPostId': 'count'
-}).reset_index()
-sector_postings.columns = ['Sector', 'Total Postings']
-
-# Create sector_growth_trend (using posting recency as age indicator)
-sector_recency_df = tech_df[tech_df['posting_recency'].notna()].copy()
-sector_growth_trend = sector_recency_df.groupby('Sector').agg({
-    'posting_recency': 'mean'
-}).reset_index()
-sector_growth_trend.columns = ['Sector', 'Average Posting Age']
-
-# Create sector_median_salary
-sector_median_salary = tech_df.groupby('Sector').agg({
-    'salary_minimum': 'median',
-    'salary_maximum': 'median'
-}).reset_index()
-sector_median_salary['Median Salary'] = (sector_median_salary['salary_minimum'] + sector_median_salary['salary_maximum']) / 2
-sector_median_salary = sector_median_salary[['Sector', 'Median Salary']]
-
-# Define dashboard_plan configuration
-dashboard_plan = {
-    "title": "Singapore Tech Job Market Dashboard",
-    "sections": [
-        {
-            "section_title": "Tech Hiring Overview",
-            "description": "Overview of tech job postings and trends",
-            "interactive_elements": [
-                {
-                    "description": "Select Date Range"
-                }
-            ],
-            "visualizations": [
-                {"title": "Top 10 Companies by Tech Job Postings"},
-                {"title": "Total Job Postings and Vacancies Over Time"},
-                {"title": "Average Salary Range Over Time"},
-                {"title": "Average Repost Count Over Time"},
-                {"title": "Average Posting Recency Over Time"}
-            ]
-        },
-        {
-            "section_title": "Tech Job Title Analysis",
-            "description": "Analysis of tech job titles and salaries",
-            "interactive_elements": [
-                {
-                    "description": "Select Number of Top Job Titles"
-                }
-            ],
-            "visualizations": [
-                {"title": "Top 20 Tech Job Titles by Count and Salary"},
-                {"title": "Tech Job Title Count vs. Average Salary (Top 20)"}
-            ]
-        },
-        {
-            "section_title": "Industry Dynamics",
-            "description": "Analysis of industry sectors and trends",
-            "interactive_elements": [
-                {
-                    "description": "Select Sector to View Dominant Roles"
-                },
-                {
-                    "description": "Select Number of Top Sectors"
-                }
-            ],
-            "visualizations": [
-                {"title": "Top 20 Sectors by Total Postings"},
-                {"title": "Top 20 Sectors by Average Posting Age"},
-                {"title": "Top 20 Sectors by Median Salary"}
-            ]
-        }
-    ]
-}
-
-# Set the title of the Streamlit application
-st.title(dashboard_plan["title"])
-
-# --- Tech Hiring Overview Section ---
-st.header(dashboard_plan["sections"][0]["section_title"])
-st.write(dashboard_plan["sections"][0]["description"])
-
-# Date range slider for filtering time series data
-date_list = pd.to_datetime(daily_metrics['Date']).tolist()
-min_date = min(date_list).date()
-max_date = max(date_list).date()
-
-selected_date_range = st.slider(
-    dashboard_plan["sections"][0]["interactive_elements"][0]["description"],
-    min_value=min_date,
-    max_value=max_date,
-    value=(min_date, max_date),
-    format="YYYY-MM-DD"
-)
-
-# Convert selected_date_range to datetime objects
-start_date = datetime.combine(selected_date_range[0], datetime.min.time())
-end_date = datetime.combine(selected_date_range[1], datetime.max.time())
-
-# Filter time series dataframes based on selected date range
-filtered_daily_metrics = daily_metrics[
-    (pd.to_datetime(daily_metrics['Date']) >= start_date) &
-    (pd.to_datetime(daily_metrics['Date']) <= end_date)
-]
-
-filtered_salary_over_time = salary_over_time[
-    (pd.to_datetime(salary_over_time['metadata_newPostingDate']) >= start_date) &
-    (pd.to_datetime(salary_over_time['metadata_newPostingDate']) <= end_date)
-]
-
-filtered_average_repost_over_time = average_repost_over_time[
-    (pd.to_datetime(average_repost_over_time['Date']) >= start_date) &
-    (pd.to_datetime(average_repost_over_time['Date']) <= end_date)
-]
-
-filtered_average_recency_over_time = average_recency_over_time[
-    (pd.to_datetime(average_recency_over_time['Date']) >= start_date) &
-    (pd.to_datetime(average_recency_over_time['Date']) <= end_date)
-]
-
-
-# Layout for Tech Hiring Overview - Optimized grid layout
-# First row: Top Companies table (1/3) + Postings chart (2/3)
-row1_col1, row1_col2 = st.columns([1, 2])
-
-with row1_col1:
-    st.subheader(dashboard_plan["sections"][0]["visualizations"][0]["title"])
-    st.dataframe(company_tech_job_counts.head(10), use_container_width=True)
-
-with row1_col2:
-    # Plot Total Job Postings and Vacancies Over Time
-    fig_postings_vacancies = go.Figure()
-    fig_postings_vacancies.add_trace(go.Scatter(x=filtered_daily_metrics['Date'], y=filtered_daily_metrics['Total Postings'], mode='lines', name='Total Postings',
-                                             hovertemplate='Date: %{x}<br>Total Postings: %{y}<extra></extra>', fill='tozeroy'))
-    fig_postings_vacancies.add_trace(go.Scatter(x=filtered_daily_metrics['Date'], y=filtered_daily_metrics['Total Vacancies'], mode='lines', name='Total Vacancies',
-                                             hovertemplate='Date: %{x}<br>Total Vacancies: %{y}<extra></extra>', fill='tonexty'))
-    fig_postings_vacancies.update_layout(title=dashboard_plan["sections"][0]["visualizations"][1]["title"], 
-                                        xaxis_title='Date', 
-                                        yaxis_title='Count',
-                                        height=350)
-    st.plotly_chart(fig_postings_vacancies, use_container_width=True)
-
-# Second row: Salary Range and Repost Count side by side
-row2_col1, row2_col2 = st.columns(2)
-
-with row2_col1:
-    # Plot Average Minimum and Maximum Salary Over Time
-    fig_salary_range = go.Figure()
-    fig_salary_range.add_trace(go.Scatter(x=filtered_salary_over_time['metadata_newPostingDate'], 
-                                         y=filtered_salary_over_time['salary_minimum'], 
-                                         mode='lines', 
-                                         name='Average Minimum Salary',
-                                         fill='tozeroy'))
-    fig_salary_range.add_trace(go.Scatter(x=filtered_salary_over_time['metadata_newPostingDate'], 
-                                         y=filtered_salary_over_time['salary_maximum'], 
-                                         mode='lines', 
-                                         name='Average Maximum Salary',
-                                         fill='tonexty'))
-    fig_salary_range.update_layout(title=dashboard_plan["sections"][0]["visualizations"][2]["title"], 
-                                  xaxis_title='Date', 
-                                  yaxis_title='Salary',
-                                  height=350)
-    st.plotly_chart(fig_salary_range, use_container_width=True)
-
-with row2_col2:
-    # Plot Average Repost Count Over Time
-    fig_repost = px.line(filtered_average_repost_over_time, 
-                        x='Date', 
-                        y='Average Repost Count', 
-                        title=dashboard_plan["sections"][0]["visualizations"][3]["title"],
-                        hover_data={'Date': True, 'Average Repost Count': ':.2f'})
-    fig_repost.update_layout(height=350)
-    st.plotly_chart(fig_repost, use_container_width=True)
-
-# Third row: Posting Recency chart (can be full width or half)
-row3_col1, row3_col2 = st.columns(2)
-
-with row3_col1:
-    # Plot Average Posting Recency Over Time
-    fig_recency = px.line(filtered_average_recency_over_time, 
-                         x='Date', 
-                         y='Average Posting Recency', 
-                         title=dashboard_plan["sections"][0]["visualizations"][4]["title"],
-                         hover_data={'Date': True, 'Average Posting Recency': ':.2f'})
-    fig_recency.update_layout(height=350)
-    st.plotly_chart(fig_recency, use_container_width=True)
-
-with row3_col2:
-    # Add a summary metrics card or keep empty for future expansion
-    st.subheader("Quick Stats")
-    col1_stat, col2_stat, col3_stat = st.columns(3)
-    with col1_stat:
-        st.metric("Total Tech Jobs", f"{len(tech_df):,}")
-    with col2_stat:
-        avg_salary = tech_df[tech_df['salary_minimum'].notna() & tech_df['salary_maximum'].notna()]
-        if len(avg_salary) > 0:
-            avg_sal = (avg_salary['salary_minimum'].mean() + avg_salary['salary_maximum'].mean()) / 2
-            st.metric("Avg Salary", f"${avg_sal:,.0f}")
+# Build (or memory-map a precomputed artifact of) every dashboard frame once per data
+# version and keyword list. The reloader is shared across sessions: it watches the source,
+# builds the next version on a background thread and swaps it in when it is complete.
+@st.cache_resource(show_spinner=False, max_entries=2, on_release=Reloader.stop)
+def data_reloader(keywords):
+    keywords = list(keywords)
+    return Reloader(lambda: current_version(keywords), lambda version: load_store(version, keywords)).start()
+
+# Query results of every section, shared across sessions. Keys are (data version,
+# section, filter values); results are returned without a copy.
+@st.cache_resource(on_release=ResultCache.close)
+def result_cache():
+    return ResultCache()
+
+# Time every stage of this rerun. ?diagnostics=1 shows the timings at the bottom of
+# the page; ?profile=1 (or ?profile=pyinstrument) profiles this rerun only, when the server
+# allows it (SGJOBDATA_DIAGNOSTICS, or &profile_token= matching SGJOBDATA_PROFILE_TOKEN).
+show_diagnostics = DIAGNOSTICS or st.query_params.get('diagnostics') == '1'
+profile_mode = st.query_params.get('profile')
+profile_token = st.query_params.get('profile_token')
+for param in ('profile', 'profile_token'):
+    if param in st.query_params:
+        del st.query_params[param]
+if not profiling_allowed(profile_token):
+    profile_mode = None
+diagnostics = Recorder(profile='pyinstrument' if profile_mode == 'pyinstrument' else profile_mode).start()
+# Widgets whose values go into the diagnostics log
+section_widget_keys = ('num_top_titles', 'selected_sector', 'num_top_sectors', 'all_categories')
+data_version = None
+try:
+    # The handle is taken once per rerun, so the whole page renders one dataset version and
+    # an open session keeps its version until it reruns.
+    tech_keywords = tuple(load_tech_keywords())
+    reloader = data_reloader(tech_keywords)
+    with stage('load_aggregates'):
+        if reloader.ready:
+            data = reloader.current()
         else:
-            st.metric("Avg Salary", "N/A")
-    with col3_stat:
-        total_vacancies = tech_df['numberOfVacancies'].fillna(0).sum()
-        st.metric("Total Vacancies", f"{total_vacancies:,.0f}")
-
+            with st.spinner("Preparing dashboard data..."):
+                data = reloader.current()
+    store, data_version = data.store, data.version
+    if reloader.last_error is not None:
+        st.warning(f"Reloading the data failed ({type(reloader.last_error).__name__}: {reloader.last_error}). "
+                   f"Showing the version loaded at {datetime.fromtimestamp(data.loaded_at):%Y-%m-%d %H:%M}.")
+
+    # Built figures, shared across sessions and keyed by chart, data version and the widget
+    # values the chart depends on, so a rerun rebuilds only the charts whose inputs changed.
+    # Building a Plotly figure costs far more than serializing it in st.plotly_chart.
+    @st.cache_resource(show_spinner=False, max_entries=256)
+    def cached_figure(name, key, _build):
+        return _build()
+
+    # Define dashboard_plan configuration
+    dashboard_plan = {
+        "title": "Singapore Tech Job Market Dashboard",
+        "sections": [
+            {
+                "section_title": "Tech Hiring Overview",
+                "description": "Overview of tech job postings and trends",
+                "interactive_elements": [
+                    {
+                        "description": "Select Date Range"
+                    }
+                ],
+                "visualizations": [
+                    {"title": "Top 10 Companies by Tech Job Postings"},
+                    {"title": "Total Job Postings and Vacancies Over Time"},
+                    {"title": "Average Salary Range Over Time"},
+                    {"title": "Average Repost Count Over Time"},
+                    {"title": "Average Posting Recency Over Time"}
+                ]
+            },
+            {
+                "section_title": "Tech Job Title Analysis",
+                "description": "Analysis of tech job titles and salaries",
+                "interactive_elements": [
+                    {
+                        "description": "Select Number of Top Job Titles"
+                    }
+                ],
+                "visualizations": [
+                    {"title": "Top 20 Tech Job Titles by Count and Salary"},
+                    {"title": "Tech Job Title Count vs. Average Salary (Top 20)"}
+                ]
+            },
+            {
+                "section_title": "Industry Dynamics",
+                "description": "Analysis of industry sectors and trends",
+                "interactive_elements": [
+                    {
+                        "description": "Select Sector to View Dominant Roles"
+                    },
+                    {
+                        "description": "Select Number of Top Sectors"
+                    }
+                ],
+                "visualizations": [
+                    {"title": "Top 20 Sectors by Total Postings"},
+                    {"title": "Top 20 Sectors by Average Posting Age"},
+                    {"title": "Top 20 Sectors by Median Salary"}
+                ]
+            }
+        ]
+    }
 
-# --- Tech Job Title Analysis Section ---
-st.header(dashboard_plan["sections"][1]["section_title"])
-st.write(dashboard_plan["sections"][1]["description"])
+    # Set the title of the Streamlit application
+    st.title(dashboard_plan["title"])
 
-# Dropdown for selecting number of top job titles
-num_top_titles = st.selectbox(
-    dashboard_plan["sections"][1]["interactive_elements"][0]["description"],
-    options=[10, 20, 50, 100],
-    index=1
-)
+    # Date range slider shared by every section; moving it reruns the whole page
+    min_date = store.min_date.date()
+    max_date = store.max_date.date()
 
-# Filter tech_job_salary_summary based on dropdown selection
-filtered_tech_job_salary_summary = tech_job_salary_summary.head(num_top_titles)
-
-# Layout: Table and Scatter plot side by side
-job_title_col1, job_title_col2 = st.columns([1, 1.5])
-
-with job_title_col1:
-    st.subheader(dashboard_plan["sections"][1]["visualizations"][0]["title"].replace("20", str(num_top_titles)))
-    st.dataframe(filtered_tech_job_salary_summary, use_container_width=True, height=400)
-
-with job_title_col2:
-    # Scatter plot of Tech Job Title Count vs. Average Salary
-    fig_tech_salary_scatter = px.scatter(filtered_tech_job_salary_summary,
-                                         x='Count',
-                                         y='Average_Salary',
-                                         text='Tech Job Title',
-                                         title=dashboard_plan["sections"][1]["visualizations"][1]["title"].replace("20", str(num_top_titles)))
-    fig_tech_salary_scatter.update_traces(textposition='top center')
-    fig_tech_salary_scatter.update_layout(xaxis_title='Number of Postings', 
-                                         yaxis_title='Average Salary', 
-                                         hovermode='closest',
-                                         height=400)
-    st.plotly_chart(fig_tech_salary_scatter, use_container_width=True)
-
-
-# --- Industry Dynamics Section ---
-st.header(dashboard_plan["sections"][2]["section_title"])
-st.write(dashboard_plan["sections"][2]["description"])
-
-# Dropdown controls in a row
-industry_control_col1, industry_control_col2 = st.columns(2)
-
-with industry_control_col1:
-    # Dropdown for selecting a sector to view dominant roles
-    # Get sorted list of unique sectors (excluding 'Unknown' if there are other options)
-    available_sectors = sorted([s for s in dominant_roles_per_sector['Sector'].unique() if s != 'Unknown'])
-    if not available_sectors:  # If only 'Unknown' exists, include it
-        available_sectors = ['Unknown']
-    elif 'Unknown' in dominant_roles_per_sector['Sector'].unique():  # Add Unknown at the end if it exists
-        available_sectors.append('Unknown')
-    
-    selected_sector = st.selectbox(
-        dashboard_plan["sections"][2]["interactive_elements"][0]["description"],
-        options=available_sectors,
-        index=0 if available_sectors else None
+    selected_date_range = st.slider(
+        dashboard_plan["sections"][0]["interactive_elements"][0]["description"],
+        min_value=min_date,
+        max_value=max_date,
+        value=(min_date, max_date),
+        format="YYYY-MM-DD",
+        key='date_range'
     )
 
-with industry_control_col2:
-    # Dropdown for selecting number of top sectors for bar charts
-    num_top_sectors = st.selectbox(
-        dashboard_plan["sections"][2]["interactive_elements"][1]["description"],
-        options=[10, 20, 30, 40],
-        index=1
-    )
+    # Convert selected_date_range to datetime objects
+    start_date = datetime.combine(selected_date_range[0], datetime.min.time())
+    end_date = datetime.combine(selected_date_range[1], datetime.max.time())
 
-# Filter dominant_roles_per_sector based on selected sector
-filtered_dominant_roles = dominant_roles_per_sector[dominant_roles_per_sector['Sector'] == selected_sector]
-
-# Filter sector dataframes based on dropdown selection for number of top sectors
-filtered_sector_postings = sector_postings.sort_values(by='Total Postings', ascending=False).head(num_top_sectors)
-filtered_sector_growth_trend = sector_growth_trend.sort_values(by='Average Posting Age', ascending=True).head(num_top_sectors)
-filtered_sector_median_salary = sector_median_salary.sort_values(by='Median Salary', ascending=False).head(num_top_sectors)
-
-# Layout: Dominant Roles table + first chart side by side
-industry_row1_col1, industry_row1_col2 = st.columns([1, 1.5])
-
-with industry_row1_col1:
-    # Display Dominant Roles Table for the selected sector
-    st.subheader(f"Dominant Roles in '{selected_sector}'")
-    st.dataframe(filtered_dominant_roles, use_container_width=True, height=300)
-
-with industry_row1_col2:
-    # Plotting Industry Dynamics - Total Postings
-    st.subheader(dashboard_plan["sections"][2]["visualizations"][0]["title"].replace("20", str(num_top_sectors)))
-    fig_sector_postings = px.bar(filtered_sector_postings, 
-                                 x='Sector', 
-                                 y='Total Postings', 
-                                 title=dashboard_plan["sections"][2]["visualizations"][0]["title"].replace("20", str(num_top_sectors)))
-    fig_sector_postings.update_layout(
-        xaxis={'categoryorder':'total descending', 'tickangle': -45},
-        height=300
-    )
-    st.plotly_chart(fig_sector_postings, use_container_width=True)
-
-# Layout: Growth trend and Median Salary side by side
-industry_row2_col1, industry_row2_col2 = st.columns(2)
-
-with industry_row2_col1:
-    st.subheader(dashboard_plan["sections"][2]["visualizations"][1]["title"].replace("20", str(num_top_sectors)))
-    fig_sector_growth = px.bar(filtered_sector_growth_trend, 
-                              x='Sector', 
-                              y='Average Posting Age', 
-                              title=dashboard_plan["sections"][2]["visualizations"][1]["title"].replace("20", str(num_top_sectors)))
-    fig_sector_growth.update_layout(
-        xaxis={'categoryorder':'total ascending', 'tickangle': -45},
-        height=350
-    )
-    st.plotly_chart(fig_sector_growth, use_container_width=True)
-
-with industry_row2_col2:
-    st.subheader(dashboard_plan["sections"][2]["visualizations"][2]["title"].replace("20", str(num_top_sectors)))
-    fig_sector_salary = px.bar(filtered_sector_median_salary, 
-                              x='Sector', 
-                              y='Median Salary', 
-                              title=dashboard_plan["sections"][2]["visualizations"][2]["title"].replace("20", str(num_top_sectors)))
-    fig_sector_salary.update_layout(
-        xaxis={'categoryorder':'total descending', 'tickangle': -45},
-        height=350
-    )
-    st.plotly_chart(fig_sector_salary, use_container_width=True)
\ No newline at end of file
+
+    def section_results(section, key, compute):
+        with stage(f'results.{section}'):
+            return result_cache().get((data_version, section) + key, compute)
+
+
+    def render_chart(name, key, build, **kwargs):
+        with stage(f'figure.{name}'):
+            fig = cached_figure(name, (data_version,) + key, build)
+        # The figure is serialized to JSON inside st.plotly_chart
+        with stage(f'render.{name}', rows=sum(len(trace.x) for trace in fig.data if trace.x is not None)):
+            st.plotly_chart(fig, **kwargs)
+
+
+    # Widget values of the sections. They live in session state so they survive while their
+    # tab is closed; Streamlit otherwise drops the state of widgets that were not rendered.
+    section_widget_defaults = {
+        'num_top_titles': 20,
+        'selected_sector': store.available_sectors[0] if store.available_sectors else None,
+        'num_top_sectors': 20,
+        'all_categories': False,
+    }
+    for key, default in section_widget_defaults.items():
+        st.session_state[key] = st.session_state.get(key, default)
+    if st.session_state['selected_sector'] not in store.available_sectors:
+        # The sector list changed with the data
+        st.session_state['selected_sector'] = section_widget_defaults['selected_sector']
+
+
+    def section_fragment(func):
+        # Run a section as a fragment, so its own widgets rerun only this function. A
+        # fragment rerun happens outside the full run's recorder, so it records its own stages.
+        @functools.wraps(func)
+        def run(*args):
+            if current() is not None:
+                return func(*args)
+            recorder = Recorder().start()
+            try:
+                return func(*args)
+            finally:
+                recorder.finish(context={'fragment': func.__name__,
+                                         **{key: st.session_state.get(key) for key in section_widget_keys}})
+        return st.fragment(run)
+
+
+    # --- Tech Hiring Overview Section ---
+    @section_fragment
+    def tech_hiring_overview(start_date, end_date):
+        st.write(dashboard_plan["sections"][0]["description"])
+
+        # Wide ranges are resampled to weeks or months, then thinned with LTTB, so each
+        # time-series trace stays within the chart point budget
+        timeseries_freq = granularity(start_date, end_date)
+        timeseries_label = GRANULARITIES[timeseries_freq]
+
+        def overview_results():
+            # Slice the date-sorted time series by binary search on its DatetimeIndex
+            with stage('query.timeseries_window') as record:
+                date_window = store.timeseries_window(start_date, end_date, timeseries_freq)
+                filtered_daily_metrics = downsample(date_window[['Total Postings', 'Total Vacancies']].reset_index(),
+                                                    'Date', ['Total Postings', 'Total Vacancies'])
+                filtered_salary_over_time = downsample(date_window[['salary_minimum', 'salary_maximum']].dropna().reset_index(),
+                                                       'Date', ['salary_minimum', 'salary_maximum'])
+                filtered_average_repost_over_time = downsample(date_window[['Average Repost Count']].dropna().reset_index(),
+                                                               'Date', ['Average Repost Count'])
+                filtered_average_recency_over_time = downsample(date_window[['Average Posting Recency']].dropna().reset_index(),
+                                                                'Date', ['Average Posting Recency'])
+                record.rows = len(date_window)
+
+            # Top companies for the selected window, from the day x company count matrix
+            with stage('query.company_ranking'):
+                filtered_company_tech_job_counts = store.company_ranking(start_date, end_date, 10)
+
+            # Quick Stats for the selected window, from prefix sums over the daily totals
+            with stage('query.quick_stats'):
+                quick_stats = store.quick_stats(start_date, end_date)
+            return (filtered_daily_metrics, filtered_salary_over_time, filtered_average_repost_over_time,
+                    filtered_average_recency_over_time, filtered_company_tech_job_counts, quick_stats)
+
+        (filtered_daily_metrics, filtered_salary_over_time, filtered_average_repost_over_time,
+         filtered_average_recency_over_time, filtered_company_tech_job_counts,
+         quick_stats) = section_results('overview', (start_date, end_date), overview_results)
+
+        # Layout for Tech Hiring Overview - Optimized grid layout
+        # First row: Top Companies table (1/3) + Postings chart (2/3)
+        row1_col1, row1_col2 = st.columns([1, 2])
+
+        with row1_col1:
+            st.subheader(dashboard_plan["sections"][0]["visualizations"][0]["title"])
+            st.dataframe(filtered_company_tech_job_counts, use_container_width=True)
+
+        with row1_col2:
+            # Plot Total Job Postings and Vacancies Over Time
+            def build_postings_vacancies():
+                n_points = len(filtered_daily_metrics)
+                fig_postings_vacancies = go.Figure()
+                fig_postings_vacancies.add_trace(scatter_trace(n_points, x=filtered_daily_metrics['Date'], y=filtered_daily_metrics['Total Postings'], mode='lines', name='Total Postings',
+                                                               hovertemplate=f'{timeseries_label}: %{{x}}<br>Total Postings: %{{y}}<extra></extra>', fill='tozeroy'))
+                fig_postings_vacancies.add_trace(scatter_trace(n_points, x=filtered_daily_metrics['Date'], y=filtered_daily_metrics['Total Vacancies'], mode='lines', name='Total Vacancies',
+                                                               hovertemplate=f'{timeseries_label}: %{{x}}<br>Total Vacancies: %{{y}}<extra></extra>', fill='tonexty'))
+                fig_postings_vacancies.update_layout(title=dashboard_plan["sections"][0]["visualizations"][1]["title"], 
+                                                    xaxis_title=timeseries_label, 
+                                                    yaxis_title='Count',
+                                                    height=350)
+                return fig_postings_vacancies
+            render_chart('postings_vacancies', (start_date, end_date), build_postings_vacancies, use_container_width=True)
+
+        # Second row: Salary Range and Repost Count side by side
+        row2_col1, row2_col2 = st.columns(2)
+
+        with row2_col1:
+            # Plot Average Minimum and Maximum Salary Over Time
+            def build_salary_range():
+                n_points = len(filtered_salary_over_time)
+                fig_salary_range = go.Figure()
+                fig_salary_range.add_trace(scatter_trace(n_points,
+                                                         x=filtered_salary_over_time['Date'], 
+                                                         y=filtered_salary_over_time['salary_minimum'], 
+                                                         mode='lines', 
+                                                         name='Average Minimum Salary',
+                                                         fill='tozeroy'))
+                fig_salary_range.add_trace(scatter_trace(n_points,
+                                                         x=filtered_salary_over_time['Date'], 
+                                                         y=filtered_salary_over_time['salary_maximum'], 
+                                                         mode='lines', 
+                                                         name='Average Maximum Salary',
+                                                         fill='tonexty'))
+                fig_salary_range.update_layout(title=dashboard_plan["sections"][0]["visualizations"][2]["title"], 
+                                              xaxis_title=timeseries_label, 
+                                              yaxis_title='Salary',
+                                              height=350)
+                return fig_salary_range
+            render_chart('salary_range', (start_date, end_date), build_salary_range, use_container_width=True)
+
+        with row2_col2:
+            # Plot Average Repost Count Over Time
+            def build_repost():
+                fig_repost = px.line(filtered_average_repost_over_time, 
+                                    x='Date', 
+                                    y='Average Repost Count', 
+                                    title=dashboard_plan["sections"][0]["visualizations"][3]["title"],
+                                    hover_data={'Date': True, 'Average Repost Count': ':.2f'},
+                                    labels={'Date': timeseries_label},
+                                    render_mode=render_mode(len(filtered_average_repost_over_time)))
+                fig_repost.update_layout(height=350)
+                return fig_repost
+            render_chart('repost', (start_date, end_date), build_repost, use_container_width=True)
+
+        # Third row: Posting Recency chart (can be full width or half)
+        row3_col1, row3_col2 = st.columns(2)
+
+        with row3_col1:
+            # Plot Average Posting Recency Over Time
+            def build_recency():
+                fig_recency = px.line(filtered_average_recency_over_time, 
+                                     x='Date', 
+                                     y='Average Posting Recency', 
+                                     title=dashboard_plan["sections"][0]["visualizations"][4]["title"],
+                                     hover_data={'Date': True, 'Average Posting Recency': ':.2f'},
+                                     labels={'Date': timeseries_label},
+                                     render_mode=render_mode(len(filtered_average_recency_over_time)))
+                fig_recency.update_layout(height=350)
+                return fig_recency
+            render_chart('recency', (start_date, end_date), build_recency, use_container_width=True)
+
+        with row3_col2:
+            # Add a summary metrics card or keep empty for future expansion
+            st.subheader("Quick Stats")
+            col1_stat, col2_stat, col3_stat = st.columns(3)
+            with col1_stat:
+                st.metric("Total Tech Jobs", f"{quick_stats['total_tech_jobs']:,}")
+            with col2_stat:
+                if quick_stats['avg_salary'] is not None:
+                    st.metric("Avg Salary", f"${quick_stats['avg_salary']:,.0f}")
+                else:
+                    st.metric("Avg Salary", "N/A")
+            with col3_stat:
+                st.metric("Total Vacancies", f"{quick_stats['total_vacancies']:,.0f}")
+
+
+    # --- Tech Job Title Analysis Section ---
+    @section_fragment
+    def tech_job_title_analysis(start_date, end_date):
+        st.write(dashboard_plan["sections"][1]["description"])
+
+        # Dropdown for selecting number of top job titles
+        num_top_titles = st.selectbox(
+            dashboard_plan["sections"][1]["interactive_elements"][0]["description"],
+            options=[10, 20, 50, 100],
+            key='num_top_titles'
+        )
+
+        # Rank titles within the selected date window, from the day x title matrix
+        def title_results():
+            with stage('query.title_ranking', rows=num_top_titles):
+                return store.title_ranking(start_date, end_date, num_top_titles)
+
+        filtered_tech_job_salary_summary = section_results('titles', (start_date, end_date, num_top_titles), title_results)
+
+        # Layout: Table and Scatter plot side by side
+        job_title_col1, job_title_col2 = st.columns([1, 1.5])
+
+        with job_title_col1:
+            st.subheader(dashboard_plan["sections"][1]["visualizations"][0]["title"].replace("20", str(num_top_titles)))
+            st.dataframe(filtered_tech_job_salary_summary, use_container_width=True, height=400)
+
+        with job_title_col2:
+            # Scatter plot of Tech Job Title Count vs. Average Salary (WebGL for large selections)
+            def build_title_scatter():
+                fig_tech_salary_scatter = px.scatter(filtered_tech_job_salary_summary,
+                                                     x='Count',
+                                                     y='Average_Salary',
+                                                     text='Tech Job Title',
+                                                     title=dashboard_plan["sections"][1]["visualizations"][1]["title"].replace("20", str(num_top_titles)),
+                                                     render_mode=render_mode(len(filtered_tech_job_salary_summary)))
+                fig_tech_salary_scatter.update_traces(textposition='top center')
+                fig_tech_salary_scatter.update_layout(xaxis_title='Number of Postings', 
+                                                     yaxis_title='Average Salary', 
+                                                     hovermode='closest',
+                                                     height=400)
+                return fig_tech_salary_scatter
+            render_chart('title_scatter', (start_date, end_date, num_top_titles), build_title_scatter, use_container_width=True)
+
+
+    # --- Industry Dynamics Section ---
+    @section_fragment
+    def industry_dynamics(start_date, end_date):
+        st.write(dashboard_plan["sections"][2]["description"])
+
+        # Dropdown controls in a row
+        industry_control_col1, industry_control_col2 = st.columns(2)
+
+        with industry_control_col1:
+            # Dropdown for selecting a sector to view dominant roles
+            # Sorted list of sectors with 'Unknown' last (precomputed in the aggregate store)
+            available_sectors = store.available_sectors
+
+            selected_sector = st.selectbox(
+                dashboard_plan["sections"][2]["interactive_elements"][0]["description"],
+                options=available_sectors,
+                key='selected_sector'
+            )
+
+        with industry_control_col2:
+            # Dropdown for selecting number of top sectors for bar charts
+            num_top_sectors = st.selectbox(
+                dashboard_plan["sections"][2]["interactive_elements"][1]["description"],
+                options=[10, 20, 30, 40],
+                key='num_top_sectors'
+            )
+
+        # Dominant roles in the selected sector within the selected date window
+        def dominant_role_results():
+            with stage('query.dominant_roles'):
+                return store.dominant_roles(selected_sector, start_date, end_date)
+
+        filtered_dominant_roles = section_results('industry.roles', (start_date, end_date, selected_sector),
+                                                  dominant_role_results)
+
+        # Postings per sector by the first category on each posting, or counting every listed category
+        all_categories = st.toggle("Count every category listed on a posting", key='all_categories')
+
+        # Sector figures for the selected date window; medians are merged from per-day salary sketches
+        def sector_results():
+            with stage('query.sector_postings'):
+                if all_categories:
+                    sector_postings = store.category_postings(start_date, end_date)
+                else:
+                    sector_postings = store.sector_postings(start_date, end_date)
+            with stage('query.sector_growth_trend'):
+                sector_growth_trend = store.sector_growth_trend(start_date, end_date)
+            with stage('query.sector_median_salary'):
+                sector_median_salary = store.sector_median_salary(start_date, end_date)
+
+            # Filter sector dataframes based on dropdown selection for number of top sectors
+            filtered_sector_postings = sector_postings.sort_values(by='Total Postings', ascending=False).head(num_top_sectors)
+            filtered_sector_growth_trend = sector_growth_trend.sort_values(by='Average Posting Age', ascending=True).head(num_top_sectors)
+            filtered_sector_median_salary = sector_median_salary.sort_values(by='Median Salary', ascending=False).head(num_top_sectors)
+            return filtered_sector_postings, filtered_sector_growth_trend, filtered_sector_median_salary
+
+        filtered_sector_postings, filtered_sector_growth_trend, filtered_sector_median_salary = section_results(
+            'industry.sectors', (start_date, end_date, num_top_sectors, all_categories), sector_results)
+
+        # Layout: Dominant Roles table + first chart side by side
+        industry_row1_col1, industry_row1_col2 = st.columns([1, 1.5])
+
+        with industry_row1_col1:
+            # Display Dominant Roles Table for the selected sector
+            st.subheader(f"Dominant Roles in '{selected_sector}'")
+            st.dataframe(filtered_dominant_roles, use_container_width=True, height=300)
+
+        with industry_row1_col2:
+            # Plotting Industry Dynamics - Total Postings
+            st.subheader(dashboard_plan["sections"][2]["visualizations"][0]["title"].replace("20", str(num_top_sectors)))
+            def build_sector_postings():
+                fig_sector_postings = px.bar(filtered_sector_postings, 
+                                             x='Sector', 
+                                             y='Total Postings', 
+                                             title=dashboard_plan["sections"][2]["visualizations"][0]["title"].replace("20", str(num_top_sectors)))
+                fig_sector_postings.update_layout(
+                    xaxis={'categoryorder':'total descending', 'tickangle': -45},
+                    height=300
+                )
+                return fig_sector_postings
+            render_chart('sector_postings', (start_date, end_date, num_top_sectors, all_categories), build_sector_postings, use_container_width=True)
+
+        # Layout: Growth trend and Median Salary side by side
+        industry_row2_col1, industry_row2_col2 = st.columns(2)
+
+        with industry_row2_col1:
+            st.subheader(dashboard_plan["sections"][2]["visualizations"][1]["title"].replace("20", str(num_top_sectors)))
+            def build_sector_growth():
+                fig_sector_growth = px.bar(filtered_sector_growth_trend, 
+                                          x='Sector', 
+                                          y='Average Posting Age', 
+                                          title=dashboard_plan["sections"][2]["visualizations"][1]["title"].replace("20", str(num_top_sectors)))
+                fig_sector_growth.update_layout(
+                    xaxis={'categoryorder':'total ascending', 'tickangle': -45},
+                    height=350
+                )
+                return fig_sector_growth
+            render_chart('sector_growth', (start_date, end_date, num_top_sectors), build_sector_growth, use_container_width=True)
+
+        with industry_row2_col2:
+            st.subheader(dashboard_plan["sections"][2]["visualizations"][2]["title"].replace("20", str(num_top_sectors)))
+            def build_sector_salary():
+                fig_sector_salary = px.bar(filtered_sector_median_salary, 
+                                          x='Sector', 
+                                          y='Median Salary', 
+                                          title=dashboard_plan["sections"][2]["visualizations"][2]["title"].replace("20", str(num_top_sectors)))
+                fig_sector_salary.update_layout(
+                    xaxis={'categoryorder':'total descending', 'tickangle': -45},
+                    height=350
+                )
+                return fig_sector_salary
+            render_chart('sector_salary', (start_date, end_date, num_top_sectors), build_sector_salary, use_container_width=True)
+
+
+    # One tab per section. Only the open tab runs, so a section's aggregates are computed
+    # when it is first shown; switching tabs reruns the page.
+    section_tabs = st.tabs([section["section_title"] for section in dashboard_plan["sections"]],
+                           key='section', on_change='rerun')
+    for section_tab, show_section in zip(section_tabs, (tech_hiring_overview, tech_job_title_analysis, industry_dynamics)):
+        with section_tab:
+            if section_tab.open:
+                show_section(start_date, end_date)
+finally:
+    # Stop recording even when the run does not complete. Streamlit ends a run early with an
+    # exception (e.g. when a widget changes mid-run) and starts the next one on this thread,
+    # so a recorder or profiler left running would leak into every later rerun.
+    diagnostics.finish(context={
+        'date_range': [str(day) for day in st.session_state.get('date_range', ())],
+        'data_version': data_version,
+        'section': st.session_state.get('section'),
+        'result_cache': result_cache().stats(),
+        **{key: st.session_state.get(key) for key in section_widget_keys},
+    })
+
+# --- Diagnostics (hidden unless ?diagnostics=1 or a profile was requested) ---
+if show_diagnostics or diagnostics.profile_path:
+    with st.expander("Diagnostics", expanded=diagnostics.profile_path is not None):
+        st.caption(f"Rerun took {diagnostics.seconds * 1000:,.0f} ms")
+        cache_stats = result_cache().stats()
+        st.caption(f"Result cache: {cache_stats['hits'] + cache_stats['disk_hits']:,} hits "
+                   f"({cache_stats['disk_hits']:,} from disk), {cache_stats['misses']:,} misses, "
+                   f"{cache_stats['entries']:,} entries in {cache_stats['bytes'] / 2**20:,.1f} MiB, "
+                   f"{cache_stats['evictions']:,} evictions")
+        st.dataframe(diagnostics.frame(), use_container_width=True, hide_index=True)
+        if diagnostics.profile_path:
+            st.caption(f"Profile of this rerun written to {diagnostics.profile_path}")
+            st.code(diagnostics.profile_text)
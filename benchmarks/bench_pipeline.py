@@ -0,0 +1,209 @@
+"""Time and memory-profile every stage of the dashboard pipeline.
+
+Usage:
+    python -m benchmarks.bench_pipeline path/to/SGJobData.csv [--out results.json] [--repeat N]
+        [--windows N] [--workers 2 4 8] [--duckdb] [--compare baseline.json] [--threshold 1.5]
+
+Build stages (load, tech filter, category parsing, each partial aggregate
+and the store) are timed best-of-``--repeat``. Each stage's peak traced
+allocation is then measured in one extra run under ``tracemalloc``, which
+sees numpy and Python allocations but not Arrow's memory pool. Per-query
+and per-widget rerun stages are timed over random date windows (median and
+p95 per call). A widget rerun replays the store calls ``app.py`` makes when
+that widget changes, because Streamlit reruns the whole script.
+
+The results are written as JSON. With ``--compare``, any stage that got
+slower than ``--threshold`` x its baseline time is reported and the exit
+status is 1. Synthetic inputs come from ``benchmarks.generate_data``.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from aggregates import PARTIAL_AGGREGATES, prepare_tech_jobs, store_from_partials
+from categories import explode_categories, parse_categories, primary_categories
+from classify import TECH_KEYWORDS, tech_title_mask
+from ingest import load_jobs, read_source_csv
+
+# Stages faster than this are not flagged as regressions (timer noise)
+MIN_REGRESSION_SECONDS = 0.005
+
+
+def build_stage(fn, repeat, memory=True):
+    """Best-of-``repeat`` time and traced peak bytes of one build stage."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    stage = {'seconds': min(timings), 'runs': timings}
+    if memory:
+        tracemalloc.start()
+        fn()
+        stage['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, stage
+
+
+def call_stage(fn, calls):
+    """Median and p95 time per call of a cheap per-rerun query."""
+    timings = []
+    for args in calls:
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return {'seconds': float(np.median(timings)), 'p95_seconds': float(np.percentile(timings, 95)),
+            'calls': len(timings)}
+
+
+def dashboard_rerun(store, start, end, num_top_titles=20, sector=None, num_top_sectors=20):
+    """The store calls one run of app.py makes for the given widget values."""
+    store.timeseries_window(start, end)
+    store.company_ranking(start, end, 10)
+    store.quick_stats(start, end)
+    store.title_ranking(start, end, num_top_titles)
+    store.dominant_roles(sector or store.available_sectors[0], start, end)
+    store.sector_postings(start, end).sort_values('Total Postings', ascending=False).head(num_top_sectors)
+    store.sector_growth_trend(start, end)
+    store.sector_median_salary(start, end)
+
+
+def random_windows(store, n, rng):
+    days = store.timeseries.index
+    windows = []
+    for _ in range(n):
+        i, j = sorted(rng.integers(0, len(days), size=2))
+        windows.append((days[i], days[j]))
+    return windows
+
+
+def run(csv_path, repeat=3, n_windows=50, workers=(), duckdb=False, seed=0):
+    stages = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        df, stages['load.csv'] = build_stage(lambda: read_source_csv(csv_path), repeat)
+        _, stages['load.parquet_cache_build'] = build_stage(lambda: load_jobs(csv_path, cache_dir), 1, memory=False)
+        _, stages['load.parquet_cache'] = build_stage(lambda: load_jobs(csv_path, cache_dir), repeat)
+
+    _, stages['filter.tech_titles'] = build_stage(lambda: tech_title_mask(df['title'], TECH_KEYWORDS), repeat)
+
+    def parse_cold():
+        parse_categories.cache_clear()
+        return explode_categories(df['categories'], df['metadata_jobPostId'])
+    _, stages['categories.explode'] = build_stage(parse_cold, repeat)
+    _, stages['categories.primary'] = build_stage(lambda: primary_categories(df['categories']), repeat)
+
+    tech_df, stages['prepare_tech_jobs'] = build_stage(lambda: prepare_tech_jobs(df, TECH_KEYWORDS), repeat)
+    partials = {}
+    for name, build in PARTIAL_AGGREGATES.items():
+        partials[name], stages[f'aggregate.{name}'] = build_stage(lambda build=build: build(tech_df), repeat)
+    store, stages['store_from_partials'] = build_stage(lambda: store_from_partials(partials), repeat)
+
+    for n in workers:
+        from parallel import parallel_partials
+        _, stages[f'ingest.parallel[{n}]'] = build_stage(
+            lambda n=n: parallel_partials(csv_path, n, TECH_KEYWORDS), repeat, memory=False)
+    if duckdb:
+        from duckdb_engine import duckdb_partials
+        _, stages['ingest.duckdb'] = build_stage(lambda: duckdb_partials(csv_path, TECH_KEYWORDS), repeat,
+                                                 memory=False)
+
+    rng = np.random.default_rng(seed)
+    windows = random_windows(store, n_windows, rng)
+    sectors = store.available_sectors
+    queries = {
+        'timeseries_window': lambda s, e: store.timeseries_window(s, e),
+        'quick_stats': lambda s, e: store.quick_stats(s, e),
+        'company_ranking': lambda s, e: store.company_ranking(s, e, 10),
+        'title_ranking': lambda s, e: store.title_ranking(s, e, 20),
+        'dominant_roles': lambda s, e: store.dominant_roles(sectors[0], s, e),
+        'sector_postings': lambda s, e: store.sector_postings(s, e),
+        'sector_growth_trend': lambda s, e: store.sector_growth_trend(s, e),
+        'sector_median_salary': lambda s, e: store.sector_median_salary(s, e),
+    }
+    for name, query in queries.items():
+        stages[f'query.{name}'] = call_stage(query, windows)
+
+    full = (store.min_date, store.max_date)
+    stages['rerun.date_slider'] = call_stage(lambda s, e: dashboard_rerun(store, s, e), windows)
+    stages['rerun.num_top_titles'] = call_stage(
+        lambda n: dashboard_rerun(store, *full, num_top_titles=n), [(n,) for n in [10, 20, 50, 100] * 5])
+    stages['rerun.sector'] = call_stage(
+        lambda sector: dashboard_rerun(store, *full, sector=sector), [(sector,) for sector in sectors])
+    stages['rerun.num_top_sectors'] = call_stage(
+        lambda n: dashboard_rerun(store, *full, num_top_sectors=n), [(n,) for n in [10, 20, 30, 40] * 5])
+
+    meta = {
+        'csv': os.path.abspath(csv_path),
+        'csv_bytes': os.path.getsize(csv_path),
+        'rows': len(df),
+        'tech_rows': len(tech_df),
+        'repeat': repeat,
+        'windows': n_windows,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'store_bytes': int(store.memory_usage().sum()),
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        'peak_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024),
+    }
+    return {'meta': meta, 'stages': stages}
+
+
+def regressions(results, baseline, threshold):
+    """Stages whose time exceeds ``threshold`` x the baseline time."""
+    slower = []
+    for name, stage in results['stages'].items():
+        before = baseline['stages'].get(name)
+        if before and stage['seconds'] > max(before['seconds'] * threshold, MIN_REGRESSION_SECONDS):
+            slower.append((name, before['seconds'], stage['seconds']))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('csv')
+    parser.add_argument('--out', default='bench_pipeline.json')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--windows', type=int, default=50)
+    parser.add_argument('--workers', type=int, nargs='*', default=[],
+                        help='also time the parallel ingest with these worker counts')
+    parser.add_argument('--duckdb', action='store_true', help='also time the DuckDB engine')
+    parser.add_argument('--compare', help='baseline results JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=1.5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results = run(args.csv, args.repeat, args.windows, args.workers, args.duckdb, args.seed)
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=1)
+
+    print(f"{results['meta']['rows']:,} rows ({results['meta']['tech_rows']:,} tech)")
+    for name, stage in results['stages'].items():
+        peak = f"{stage['peak_bytes'] / 2**20:9.1f} MiB" if 'peak_bytes' in stage else ''
+        p95 = f"p95 {stage['p95_seconds'] * 1000:8.2f} ms" if 'p95_seconds' in stage else ''
+        print(f"  {name:<32} {stage['seconds'] * 1000:10.2f} ms  {p95 or peak}")
+    print(f'wrote {args.out}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            slower = regressions(results, json.load(f), args.threshold)
+        for name, before, after in slower:
+            print(f'REGRESSION {name}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms')
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
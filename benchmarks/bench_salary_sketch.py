@@ -0,0 +1,79 @@
+"""Check the sector salary sketches against exact pandas quantiles.
+
+Usage:
+    python -m benchmarks.bench_salary_sketch [path/to/SGJobData.csv] [--windows N] [--seed S]
+
+For the full date range and N random windows, every sector quantile from
+``AggregateStore.sector_salary_quantiles`` is compared with
+``Series.quantile`` on the same rows. The script exits non-zero if any
+value is outside the documented relative error bound.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from aggregates import SALARY_QUANTILES, build_aggregates, prepare_tech_jobs
+from ingest import DATA_PATH, load_jobs
+from quantile_sketch import RELATIVE_ACCURACY
+
+
+def exact_quantiles(tech_df, start, end, quantiles):
+    window = tech_df[(tech_df['metadata_newPostingDate'] >= start) & (tech_df['metadata_newPostingDate'] <= end)]
+    grouped = window.groupby('Sector')
+    return pd.concat({
+        column: grouped[column].quantile(list(quantiles)).unstack()
+        for column in ('salary_minimum', 'salary_maximum')
+    }, axis=1)
+
+
+def max_relative_error(estimate, exact):
+    estimate = estimate.reindex(index=exact.index, columns=exact.columns)
+    # Values below 1 are reported as 0, so they are held to an absolute error of 1
+    error = (estimate - exact).abs() / exact.abs().clip(lower=1)
+    return float(np.nanmax(error.to_numpy())) if error.size else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('csv_path', nargs='?', default=DATA_PATH)
+    parser.add_argument('--windows', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    df = load_jobs(args.csv_path)
+    store = build_aggregates(df)
+    tech_df = prepare_tech_jobs(df)
+    days = store.timeseries.index
+
+    rng = np.random.default_rng(args.seed)
+    windows = [(days[0], days[-1])]
+    for _ in range(args.windows):
+        i, j = np.sort(rng.integers(0, len(days), size=2))
+        windows.append((days[i], days[j]))
+
+    worst = 0.0
+    for start, end in windows:
+        end = end + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+        t0 = time.perf_counter()
+        estimate = store.sector_salary_quantiles(start, end, SALARY_QUANTILES)
+        sketch_time = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        exact = exact_quantiles(tech_df, start, end, SALARY_QUANTILES)
+        exact_time = time.perf_counter() - t0
+        error = max_relative_error(estimate, exact)
+        worst = max(worst, error)
+        print(f'{start.date()} .. {end.date()}: max relative error {error:.4%}  '
+              f'(sketch {sketch_time * 1000:.1f} ms, exact {exact_time * 1000:.1f} ms)')
+
+    # Small slack for floating point at bucket boundaries
+    bound = RELATIVE_ACCURACY * (1 + 1e-9)
+    print(f'\nworst relative error {worst:.4%} (bound {RELATIVE_ACCURACY:.2%})')
+    if worst > bound:
+        sys.exit('sketch error bound exceeded')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Check that the DuckDB engine returns the same aggregates as the pandas engine.
+
+Usage:
+    python -m benchmarks.check_engine_parity [path/to/SGJobData.csv] [--parquet PATH] [--windows N] [--seed S]
+
+Every partial aggregate from ``duckdb_engine.duckdb_partials`` (read from
+the CSV and, optionally, from a Parquet copy) is compared with
+``aggregates.partial_aggregates``. Then every frame the dashboard renders
+is compared for the full range and N random date windows. Counts must be
+equal; sums may differ only by floating-point summation order. The script
+exits non-zero on any mismatch and prints the build time of each engine.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from aggregates import partial_aggregates, prepare_tech_jobs, store_from_partials
+from duckdb_engine import duckdb_partials
+from ingest import DATA_PATH, load_jobs
+
+RTOL = 1e-9
+
+
+def _key_columns(frame):
+    """The frame with its index as plain object columns, sorted by them, and the key names.
+
+    A categorical level sorts by category order ('Unknown' last) while DuckDB
+    returns plain strings sorted lexically, so keys are compared as values.
+    An unnamed index (e.g. a RangeIndex) is positional and is dropped.
+    """
+    keys = [name for name in frame.index.names if name is not None]
+    frame = frame.reset_index(drop=not keys)
+    for key in keys:
+        frame[key] = frame[key].astype(object)
+    return (frame.sort_values(keys, ignore_index=True) if keys else frame), keys
+
+
+def compare_frames(name, expected, actual):
+    """Return a list of mismatch descriptions (empty if the frames agree)."""
+    if list(expected.columns) != list(actual.columns):
+        return [f'{name}: columns {list(actual.columns)} != {list(expected.columns)}']
+    if list(expected.index.names) != list(actual.index.names):
+        return [f'{name}: index levels {list(actual.index.names)} != {list(expected.index.names)}']
+    expected, keys = _key_columns(expected)
+    actual, _ = _key_columns(actual)
+    if len(expected) != len(actual) or not expected[keys].equals(actual[keys]):
+        return [f'{name}: {len(actual)} rows with a different index than the {len(expected)} expected']
+    problems = []
+    for col in expected.columns.drop(keys):
+        left, right = expected[col], actual[col]
+        if pd.api.types.is_numeric_dtype(left):
+            same = np.allclose(left.to_numpy(dtype='float64'), right.to_numpy(dtype='float64'),
+                               rtol=RTOL, atol=0, equal_nan=True)
+        else:
+            same = left.astype(object).equals(right.astype(object))
+        if not same:
+            problems.append(f'{name}.{col}: values differ')
+    return problems
+
+
+def dashboard_frames(store, start, end):
+    return {
+        'timeseries': store.timeseries_window(start, end),
+        'quick_stats': pd.DataFrame([store.quick_stats(start, end)]),
+        'company_ranking': store.company_ranking(start, end, 10),
+        'title_ranking': store.title_ranking(start, end, 20),
+        'sector_postings': store.sector_postings(start, end),
+        'category_postings': store.category_postings(start, end),
+        'sector_growth_trend': store.sector_growth_trend(start, end),
+        'sector_median_salary': store.sector_median_salary(start, end),
+        **{f'dominant_roles[{sector}]': store.dominant_roles(sector, start, end)
+           for sector in store.available_sectors},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('csv', nargs='?', default=DATA_PATH)
+    parser.add_argument('--parquet', help='also check DuckDB reading this Parquet copy of the CSV')
+    parser.add_argument('--windows', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    expected = partial_aggregates(prepare_tech_jobs(load_jobs(args.csv)))
+    print(f'pandas engine:           {time.perf_counter() - start:7.2f}s')
+    expected_store = store_from_partials(expected)
+
+    rng = np.random.default_rng(args.seed)
+    days = expected_store.daily_totals.index
+    windows = [(expected_store.min_date, expected_store.max_date)]
+    for _ in range(args.windows):
+        i, j = sorted(rng.integers(0, len(days), size=2))
+        windows.append((days[i].date(), days[j].date()))
+
+    problems = []
+    for source in [args.csv] + ([args.parquet] if args.parquet else []):
+        start = time.perf_counter()
+        actual = duckdb_partials(source)
+        kind = 'parquet' if source.endswith('.parquet') else 'csv'
+        print(f'duckdb engine ({kind + "):":<9} {time.perf_counter() - start:7.2f}s')
+        for name in expected:
+            problems += [f'{source}: {problem}' for problem in compare_frames(name, expected[name], actual[name])]
+
+        actual_store = store_from_partials(actual)
+        for window in windows:
+            left, right = dashboard_frames(expected_store, *window), dashboard_frames(actual_store, *window)
+            for name in left:
+                problems += [f'{source} {window}: {problem}'
+                             for problem in compare_frames(name, left[name], right[name])]
+
+    for problem in problems:
+        print('MISMATCH', problem)
+    print(f'{len(windows)} windows checked: {"FAIL" if problems else "OK"}')
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
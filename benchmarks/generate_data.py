@@ -0,0 +1,265 @@
+"""Generate a synthetic CSV with the SGJobData schema, for benchmarks.
+
+Usage:
+    python -m benchmarks.generate_data 1m [path/to/out.csv] [--seed S] [--chunk-rows N]
+
+The size is a row count with an optional k/m suffix (100k, 1m, 10m, ...).
+Rows are written in chunks, so 10M rows need no more memory than one chunk.
+The output depends only on the size, seed and chunk size.
+
+The distributions follow the profile of the real extract (696k rows) in
+Group_5_SGJobData.ipynb:
+
+- all 21 source columns in the original order
+- about 0.6% blank rows with no ID, dates, title or categories
+- titles: long-tailed roles (tech and non-tech) with seniority prefixes and
+  free-text suffixes, about 38% of them distinct
+- companies: Zipf-distributed, with a handful of recruitment agencies
+  posting the most jobs; about one company per 15 postings
+- categories: 1-3 entries as compact JSON (``[{"id":21,"category":...}]``),
+  with the first one correlated with the role, plus some ``[]``
+- salaries: log-normal monthly minimum by role, maximum 10-100% above it,
+  and about 1% zero
+- dates: weekday-heavy postings from 2023-03-28 to 2024-01-12; about 7% are
+  reposts whose original posting date is 1-90 days earlier
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+CATEGORIES = [
+    'Information Technology', 'Engineering', 'Banking and Finance', 'Sales / Retail', 'F&B',
+    'Admin / Secretarial', 'Accounting / Auditing / Taxation', 'Healthcare / Pharmaceutical',
+    'Building and Construction', 'Logistics / Supply Chain', 'Customer Service', 'Manufacturing',
+    'Education and Training', 'Professional Services', 'Others', 'Human Resources',
+    'Marketing / Public Relations', 'General Management', 'Hospitality', 'Repair and Maintenance',
+    'Environment / Health', 'Consulting', 'Sciences / Laboratory / R&D', 'Telecommunications',
+    'Precision Engineering', 'Design', 'Architecture / Interior Design', 'Real Estate / Property Management',
+    'General Work', 'Wholesale Trade', 'Purchasing / Merchandising', 'Risk Management',
+    'Medical / Therapy Services', 'Legal', 'Personal Care / Beauty', 'Insurance', 'Social Services',
+    'Public / Civil Service', 'Security and Investigation', 'Advertising / Media', 'Events / Promotions',
+    'Entertainment', 'Travel / Tourism',
+]
+
+# (role, primary category, median monthly minimum salary)
+ROLES = [
+    ('Software Engineer', 'Information Technology', 5500), ('Data Analyst', 'Information Technology', 4200),
+    ('Java Developer', 'Information Technology', 5200), ('Business Analyst', 'Information Technology', 4800),
+    ('IT Support Engineer', 'Information Technology', 3000), ('Network Engineer', 'Information Technology', 4200),
+    ('Cloud Architect', 'Information Technology', 8500), ('DevOps Engineer', 'Information Technology', 6000),
+    ('Data Scientist', 'Information Technology', 6500), ('Cyber Security Analyst', 'Information Technology', 6000),
+    ('Systems Engineer', 'Information Technology', 4800), ('Full Stack Developer', 'Information Technology', 5200),
+    ('Database Administrator', 'Information Technology', 5000), ('Python Developer', 'Information Technology', 5500),
+    ('Machine Learning Engineer', 'Information Technology', 7000), ('Frontend Developer', 'Information Technology', 4800),
+    ('Mechanical Engineer', 'Engineering', 4000), ('Electrical Engineer', 'Engineering', 4000),
+    ('Project Engineer', 'Building and Construction', 4000), ('Process Engineer', 'Manufacturing', 4300),
+    ('Quality Engineer', 'Manufacturing', 4000), ('Quantity Surveyor', 'Building and Construction', 3800),
+    ('Technician', 'Repair and Maintenance', 2600), ('Food Technologist', 'Sciences / Laboratory / R&D', 3000),
+    ('Accountant', 'Accounting / Auditing / Taxation', 3800), ('Accounts Assistant', 'Accounting / Auditing / Taxation', 2500),
+    ('Sales Executive', 'Sales / Retail', 2800), ('Sales Manager', 'Sales / Retail', 5000),
+    ('Retail Assistant', 'Sales / Retail', 2000), ('Admin Assistant', 'Admin / Secretarial', 2300),
+    ('Customer Service Officer', 'Customer Service', 2400), ('Cook', 'F&B', 2200), ('Chef', 'F&B', 2800),
+    ('Service Crew', 'F&B', 1900), ('Staff Nurse', 'Healthcare / Pharmaceutical', 3500),
+    ('Teacher', 'Education and Training', 3300), ('HR Executive', 'Human Resources', 3200),
+    ('Marketing Executive', 'Marketing / Public Relations', 3200), ('Digital Marketing Executive', 'Marketing / Public Relations', 3300),
+    ('Logistics Coordinator', 'Logistics / Supply Chain', 2700), ('Warehouse Assistant', 'Logistics / Supply Chain', 2000),
+    ('Relationship Manager', 'Banking and Finance', 6000), ('Financial Analyst', 'Banking and Finance', 5000),
+    ('Operations Manager', 'General Management', 5500), ('Legal Counsel', 'Legal', 8000),
+    ('Security Officer', 'Security and Investigation', 2200), ('Cleaner', 'General Work', 1600),
+    ('Driver', 'Logistics / Supply Chain', 2200), ('Receptionist', 'Hospitality', 2100),
+    ('Property Executive', 'Real Estate / Property Management', 3000), ('Designer', 'Design', 3200),
+    ('Research Scientist', 'Sciences / Laboratory / R&D', 5500), ('Procurement Executive', 'Purchasing / Merchandising', 3200),
+    ('Risk Analyst', 'Risk Management', 5500), ('Insurance Agent', 'Insurance', 2500),
+    ('Therapist', 'Medical / Therapy Services', 3200), ('Beautician', 'Personal Care / Beauty', 2000),
+]
+TECH_CATEGORIES = ('Information Technology', 'Engineering')
+TECH_ROLE_SHARE = 0.15
+SENIORITY = ['', 'Senior ', 'Junior ', 'Lead ', 'Principal ', 'Assistant ', 'Associate ']
+SENIORITY_P = [0.55, 0.2, 0.07, 0.05, 0.03, 0.05, 0.05]
+SUFFIXES = [
+    ' (Java, Spring Boot)', ' (Python, SQL)', ' (1 Year Contract)', ' - Clementi', ' - Jurong East',
+    ' | Entry Level', ' | Up to $6000', ' (Night Shift)', ' (Fab Support)', ' - Tampines',
+    ' (5 days, Office Hours)', ' - Immediate', ' (Healthcare)', ' (Banking)', ' / Hybrid',
+]
+AGENCY_WORDS = ['SUPREME HR ADVISORY', 'RECRUITPEDIA', 'RECRUIT EXPERT', 'ANRADUS', 'RECRUITFLASH',
+                'RECRUIT EXPRESS', 'PERSOLKELLY SINGAPORE', 'HAN YA RECRUIT', 'RK RECRUITMENT', 'TRUST RECRUIT']
+NAME_WORDS = ['ASIA', 'PACIFIC', 'GLOBAL', 'LION', 'MERLION', 'ORCHID', 'STAR', 'UNITED', 'PRIME', 'GOLDEN',
+              'EAST', 'WEST', 'NOVA', 'APEX', 'SUMMIT', 'HARBOUR', 'MARINA', 'BUKIT', 'KEPPEL', 'RAFFLES',
+              'TECH', 'DIGITAL', 'SYSTEMS', 'LOGISTICS', 'ENGINEERING', 'FOODS', 'TRADING', 'SERVICES',
+              'HOLDINGS', 'SOLUTIONS', 'CAPITAL', 'HEALTH', 'MEDICAL', 'BUILDERS', 'CATERING', 'DESIGN']
+COLUMNS = [
+    'categories', 'employmentTypes', 'metadata_expiryDate', 'metadata_isPostedOnBehalf',
+    'metadata_jobPostId', 'metadata_newPostingDate', 'metadata_originalPostingDate',
+    'metadata_repostCount', 'metadata_totalNumberJobApplication', 'metadata_totalNumberOfView',
+    'minimumYearsExperience', 'numberOfVacancies', 'occupationId', 'positionLevels',
+    'postedCompany_name', 'salary_maximum', 'salary_minimum', 'salary_type', 'status_id',
+    'status_jobStatus', 'title',
+]
+EMPLOYMENT_TYPES = ['Permanent', 'Full Time', 'Contract', 'Part Time', 'Temporary', 'Internship/Attachment',
+                    'Freelance', 'Flexi-work']
+POSITION_LEVELS = ['Executive', 'Senior Executive', 'Non-executive', 'Junior Executive', 'Manager',
+                   'Professional', 'Middle Management', 'Fresh/entry level', 'Senior Management']
+FIRST_DAY, LAST_DAY = pd.Timestamp('2023-03-28'), pd.Timestamp('2024-01-12')
+
+
+def parse_size(text):
+    """Row count from e.g. '100k', '1m', '10M' or '250000'."""
+    text = text.strip().lower().replace('_', '')
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def _zipf_weights(n, a):
+    weights = 1.0 / np.arange(1, n + 1) ** a
+    return weights / weights.sum()
+
+
+def _company_pool(n_companies, rng):
+    words = np.array(NAME_WORDS)
+    first, second = rng.integers(0, len(words), (2, n_companies))
+    names = pd.Series(words[first]) + ' ' + pd.Series(words[second]) + ' ' + \
+        pd.Series(np.arange(n_companies)).map(lambda i: f'{i:X}') + ' PTE. LTD.'
+    names[:len(AGENCY_WORDS)] = [f'{word} PTE. LTD.' for word in AGENCY_WORDS][:n_companies]
+    return names.to_numpy(dtype=object)
+
+
+def _category_pool(rng, per_primary=400):
+    """Distinct categories strings grouped by their first category."""
+    popularity = _zipf_weights(len(CATEGORIES), 0.8)
+    strings, offsets = [], [0]
+    for primary in range(len(CATEGORIES)):
+        group = set()
+        while len(group) < per_primary:
+            extra = rng.choice(len(CATEGORIES), rng.integers(0, 3), replace=False, p=popularity)
+            entries = [primary] + [int(k) for k in extra if k != primary]
+            group.add(json.dumps([{'id': k + 1, 'category': CATEGORIES[k]} for k in entries],
+                                 separators=(',', ':')))
+        strings.extend(sorted(group))
+        offsets.append(len(strings))
+    return np.array(strings, dtype=object), np.array(offsets)
+
+
+class Generator:
+    """Draws chunks of synthetic postings from fixed title, company and category pools."""
+
+    def __init__(self, n_rows, seed=0):
+        self.n_rows = n_rows
+        self.seed = seed
+        rng = np.random.default_rng([seed, 0])
+        # IT and engineering roles get TECH_ROLE_SHARE of the postings; weights are
+        # long-tailed within each group
+        tech = np.array([category in TECH_CATEGORIES for _, category, _ in ROLES])
+        self.role_p = np.zeros(len(ROLES))
+        for group, share in ((tech, TECH_ROLE_SHARE), (~tech, 1 - TECH_ROLE_SHARE)):
+            weights = _zipf_weights(int(group.sum()), 0.9)
+            rng.shuffle(weights)
+            self.role_p[group] = share * weights
+        self.role_names = np.array([role for role, _, _ in ROLES], dtype=object)
+        self.role_category = np.array([CATEGORIES.index(category) for _, category, _ in ROLES])
+        self.role_salary = np.array([salary for _, _, salary in ROLES], dtype=float)
+        self.companies = _company_pool(max(n_rows // 15, 50), rng)
+        self.company_p = _zipf_weights(len(self.companies), 0.9)
+        self.categories, self.category_offsets = _category_pool(rng)
+        self.category_p = _zipf_weights(len(CATEGORIES), 0.8)
+        days = pd.date_range(FIRST_DAY, LAST_DAY)
+        self.days = days
+        self.day_p = np.where(days.dayofweek >= 5, 0.25, 1.0)
+        self.day_p /= self.day_p.sum()
+
+    def chunk(self, index, start, n):
+        """Rows ``[start, start + n)`` as a DataFrame of CSV-ready columns."""
+        rng = np.random.default_rng([self.seed, 1, index])
+        role = rng.choice(len(ROLES), n, p=self.role_p)
+
+        # Titles: seniority + role + optional suffix; 30% carry a job reference, which
+        # yields the long tail of distinct titles in the real data
+        seniority = np.array(SENIORITY, dtype=object)[rng.choice(len(SENIORITY), n, p=SENIORITY_P)]
+        suffix = np.where(rng.random(n) < 0.35,
+                          np.array(SUFFIXES, dtype=object)[rng.integers(0, len(SUFFIXES), n)], '')
+        reference = np.where(rng.random(n) < 0.3,
+                             pd.Series(rng.integers(0, max(self.n_rows // 3, 1), n)).map(' #{:d}'.format), '')
+        title = pd.Series(seniority) + pd.Series(self.role_names[role]) + pd.Series(suffix) + pd.Series(reference)
+
+        # First category follows the role 70% of the time
+        primary = np.where(rng.random(n) < 0.7, self.role_category[role],
+                           rng.choice(len(CATEGORIES), n, p=self.category_p))
+        group_size = np.diff(self.category_offsets)[primary]
+        categories = self.categories[self.category_offsets[primary] + rng.integers(0, group_size)]
+        categories[rng.random(n) < 0.005] = '[]'
+
+        new_day = rng.choice(len(self.days), n, p=self.day_p)
+        repost = rng.choice(3, n, p=[0.93, 0.05, 0.02])
+        original_day = new_day - np.where(repost > 0, rng.integers(1, 91, n), 0)
+        new_date = self.days[new_day]
+        original_date = FIRST_DAY + pd.to_timedelta(original_day, unit='D')
+
+        salary_min = np.round(self.role_salary[role] * rng.lognormal(0, 0.35, n) * (1 + 0.25 * (seniority == 'Senior ')), -2)
+        salary_max = np.round(salary_min * rng.uniform(1.1, 2.0, n), -2)
+        zero = rng.random(n) < 0.01
+        salary_min[zero] = salary_max[zero] = 0
+
+        frame = pd.DataFrame({
+            'categories': categories,
+            'employmentTypes': np.array(EMPLOYMENT_TYPES, dtype=object)[rng.choice(len(EMPLOYMENT_TYPES), n, p=_zipf_weights(len(EMPLOYMENT_TYPES), 1.5))],
+            'metadata_expiryDate': (new_date + pd.to_timedelta(rng.choice([14, 30], n), unit='D')).strftime('%Y-%m-%d'),
+            'metadata_isPostedOnBehalf': rng.random(n) < 0.1,
+            'metadata_jobPostId': pd.Series(np.arange(start, start + n)).map('MCF-2023-{:07d}'.format),
+            'metadata_newPostingDate': new_date.strftime('%Y-%m-%d'),
+            'metadata_originalPostingDate': original_date.strftime('%Y-%m-%d'),
+            'metadata_repostCount': repost,
+            'metadata_totalNumberJobApplication': rng.geometric(0.3, n) - 1,
+            'metadata_totalNumberOfView': rng.geometric(0.03, n) - 1,
+            'minimumYearsExperience': rng.integers(0, 9, n),
+            'numberOfVacancies': np.minimum(rng.geometric(0.5, n), 999),
+            'occupationId': '',
+            'positionLevels': np.array(POSITION_LEVELS, dtype=object)[rng.integers(0, len(POSITION_LEVELS), n)],
+            'postedCompany_name': self.companies[rng.choice(len(self.companies), n, p=self.company_p)],
+            'salary_maximum': salary_max.astype(np.int64),
+            'salary_minimum': salary_min.astype(np.int64),
+            'salary_type': 'Monthly',
+            'status_id': 0,
+            'status_jobStatus': np.where(rng.random(n) < 0.9, 'Closed', 'Open'),
+            'title': title.to_numpy(dtype=object),
+        }, columns=COLUMNS)
+
+        # Blank rows, as in the real extract
+        blank = rng.random(n) < 0.006
+        for col in ('categories', 'employmentTypes', 'metadata_expiryDate', 'metadata_jobPostId',
+                    'metadata_newPostingDate', 'metadata_originalPostingDate', 'positionLevels',
+                    'postedCompany_name', 'salary_type', 'status_jobStatus', 'title'):
+            frame[col] = frame[col].astype(object).where(~blank, None)
+        return frame
+
+
+def generate(path, n_rows, seed=0, chunk_rows=500_000):
+    """Write ``n_rows`` synthetic postings to ``path``, one chunk at a time."""
+    generator = Generator(n_rows, seed)
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    for index, start in enumerate(range(0, n_rows, chunk_rows)):
+        frame = generator.chunk(index, start, min(chunk_rows, n_rows - start))
+        frame.to_csv(tmp_path, index=False, header=index == 0, mode='w' if index == 0 else 'a')
+    os.replace(tmp_path, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('size', help='number of rows, e.g. 100k, 1m or 10m')
+    parser.add_argument('out', nargs='?', help='output CSV (default: SGJobData-synthetic-<size>.csv)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-rows', type=int, default=500_000)
+    args = parser.parse_args(argv)
+
+    n_rows = parse_size(args.size)
+    out = args.out or f'SGJobData-synthetic-{args.size.lower()}.csv'
+    start = time.perf_counter()
+    generate(out, n_rows, args.seed, args.chunk_rows)
+    print(f'wrote {n_rows:,} rows to {out} ({os.path.getsize(out) / 2**20:.0f} MiB) '
+          f'in {time.perf_counter() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
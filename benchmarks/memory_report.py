@@ -0,0 +1,76 @@
+"""Bytes held at each stage of the data pipeline, before and after the compact representation.
+
+Usage:
+    python -m benchmarks.memory_report [path/to/SGJobData.csv]
+
+The "legacy" stages repeat what the original dashboard kept alive: the full
+CSV with every column in default dtypes, the tech_df copy and the filtered
+.copy() frames built for each chart. The "compact" stages are the current
+pipeline: pruned, categorical and float32 columns, one tech_df built from a
+single mask, and the AggregateStore the dashboard actually keeps. Sizes are
+deep (string contents included).
+"""
+import argparse
+
+import pandas as pd
+
+from aggregates import build_aggregates, prepare_tech_jobs
+from categories import explode_categories
+from classify import TECH_KEYWORDS, tech_title_mask
+from ingest import DATA_PATH, read_source_csv
+
+
+def deep_bytes(frame):
+    return int(frame.memory_usage(deep=True).sum())
+
+
+def legacy_stages(csv_path):
+    df = pd.read_csv(csv_path)
+    for col in ('metadata_newPostingDate', 'metadata_originalPostingDate'):
+        df[col] = pd.to_datetime(df[col], errors='coerce')
+    tech_df = df[tech_title_mask(df['title'], TECH_KEYWORDS)].copy()
+    tech_df = tech_df[tech_df['metadata_newPostingDate'].notna()].copy()
+    tech_df['posting_recency'] = (tech_df['metadata_newPostingDate'] - tech_df['metadata_originalPostingDate']).dt.days
+    salary_df = tech_df[tech_df['salary_minimum'].notna() & tech_df['salary_maximum'].notna()].copy()
+    repost_df = tech_df[tech_df['metadata_repostCount'].notna()].copy()
+    recency_df = tech_df[tech_df['posting_recency'].notna()].copy()
+    tech_categories = explode_categories(tech_df['categories'])
+    return [
+        ('read_csv (all columns)', deep_bytes(df)),
+        ('tech_df', deep_bytes(tech_df)),
+        ('salary_df', deep_bytes(salary_df)),
+        ('repost_df', deep_bytes(repost_df)),
+        ('recency_df', deep_bytes(recency_df)),
+        ('tech_categories', deep_bytes(tech_categories)),
+    ]
+
+
+def compact_stages(csv_path):
+    df = read_source_csv(csv_path)
+    tech_df = prepare_tech_jobs(df, TECH_KEYWORDS)
+    store = build_aggregates(df, TECH_KEYWORDS)
+    return [
+        ('read_source_csv (pruned)', deep_bytes(df)),
+        ('tech_df (pruned, one mask)', deep_bytes(tech_df)),
+        ('AggregateStore', int(store.memory_usage().sum())),
+    ]
+
+
+def print_stages(title, stages):
+    print(title)
+    for name, size in stages:
+        print(f'  {name:<32} {size / 2**20:10.2f} MiB')
+    print(f'  {"total":<32} {sum(size for _, size in stages) / 2**20:10.2f} MiB')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('csv', nargs='?', default=DATA_PATH)
+    args = parser.parse_args(argv)
+
+    print_stages('legacy', legacy_stages(args.csv))
+    print_stages('compact', compact_stages(args.csv))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Fast parsing of the ``categories`` column.
+
+Each posting stores its categories as a string such as
+``[{"id":21,"category":"Information Technology"}]``. Only a few hundred
+distinct strings occur, so every distinct string is parsed once (JSON
+first, ``ast.literal_eval`` as a fallback) and the result is broadcast to
+every posting. Each posting's primary sector comes from
+``primary_categories``. ``explode_categories`` builds a compact table with
+one row per (job_id, category) for figures that count every category
+listed on a posting.
+"""
+import ast
+import json
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+UNKNOWN_SECTOR = 'Unknown'
+
+
+@lru_cache(maxsize=65536)
+def parse_categories(categories_str):
+    """Return ``(position, category)`` pairs for one categories string.
+
+    ``position`` is the index of the entry in the original list, so callers
+    can tell whether the first entry was a valid category.
+    """
+    if not categories_str:
+        return ()
+    try:
+        categories_list = json.loads(categories_str)
+    except ValueError:
+        try:
+            categories_list = ast.literal_eval(categories_str)
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            return ()
+    if not isinstance(categories_list, list):
+        return ()
+    return tuple((position, entry['category']) for position, entry in enumerate(categories_list)
+                 if isinstance(entry, dict) and isinstance(entry.get('category'), str))
+
+
+def primary_sector(categories_str):
+    """The first category of one categories string, or 'Unknown' if there is none.
+
+    Matches the original dashboard rule: a posting whose first list entry is
+    not a valid category is 'Unknown', even if later entries are valid.
+    """
+    pairs = parse_categories(categories_str) if isinstance(categories_str, str) else ()
+    return pairs[0][1] if pairs and pairs[0][0] == 0 else UNKNOWN_SECTOR
+
+
+def primary_categories(categories):
+    """Return each posting's primary sector as a categorical, without exploding the lists.
+
+    The categories are every category name that occurs (sorted), plus 'Unknown'.
+    """
+    codes, uniques = pd.factorize(pd.Series(categories))
+    parsed = [parse_categories(value) for value in uniques]
+    names = pd.Categorical([name for pairs in parsed for _, name in pairs]).categories
+    if UNKNOWN_SECTOR not in names:
+        names = names.append(pd.Index([UNKNOWN_SECTOR]))
+    # One code per distinct string, broadcast to the postings (missing strings are 'Unknown')
+    sector_codes = names.get_indexer([primary_sector(value) for value in uniques]).astype(np.int32)
+    row_codes = np.full(len(codes), names.get_loc(UNKNOWN_SECTOR), dtype=np.int32)
+    present = codes >= 0
+    row_codes[present] = sector_codes[codes[present]]
+    return pd.Categorical.from_codes(row_codes, names)
+
+
+def explode_categories(categories, job_ids=None):
+    """Build the exploded category table for a column of categories strings.
+
+    Returns a DataFrame with one row per (posting, category):
+
+    - ``row``: position of the posting in ``categories`` (int32)
+    - ``job_id``: categorical job id from ``job_ids``, so ``.cat.codes`` is an
+      integer job code (only if ``job_ids`` is given)
+    - ``category``: categorical category name (``.cat.codes`` is the code)
+    - ``position``: index of the category in the posting's list, 0 = first
+    """
+    codes, uniques = pd.factorize(pd.Series(categories))
+    parsed = [parse_categories(value) for value in uniques]
+
+    lengths = np.fromiter((len(pairs) for pairs in parsed), dtype=np.int64, count=len(parsed))
+    flat_positions = np.fromiter((pos for pairs in parsed for pos, _ in pairs),
+                                 dtype=np.int16, count=int(lengths.sum()))
+    flat_names = pd.Categorical([name for pairs in parsed for _, name in pairs])
+    offsets = np.cumsum(lengths) - lengths
+
+    # Broadcast the per-distinct-string results to every posting
+    present = codes >= 0
+    row_lengths = np.zeros(len(codes), dtype=np.int64)
+    row_lengths[present] = lengths[codes[present]]
+    rows = np.repeat(np.arange(len(codes), dtype=np.int32), row_lengths)
+    within = np.arange(len(rows)) - np.repeat(np.cumsum(row_lengths) - row_lengths, row_lengths)
+    flat_index = offsets[codes[rows]] + within
+
+    table = pd.DataFrame({'row': rows})
+    if job_ids is not None:
+        job_codes, job_uniques = pd.factorize(np.asarray(job_ids, dtype=object))
+        table['job_id'] = pd.Categorical.from_codes(job_codes[rows], job_uniques)
+    table['category'] = pd.Categorical.from_codes(
+        flat_names.codes[flat_index], categories=flat_names.categories)
+    table['position'] = flat_positions[flat_index]
+    return table
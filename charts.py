@@ -0,0 +1,102 @@
+"""Keep the chart payloads bounded however long the date range is.
+
+A time-series trace longer than ``POINT_BUDGET`` points is thinned with
+Largest-Triangle-Three-Buckets (LTTB). LTTB keeps the peaks and troughs that
+give a line its shape, and drops points on flat stretches. When the selected
+range is more than ``RESAMPLE_FACTOR`` times the budget, daily points are
+resampled first, to weeks and then to months. The store re-derives the
+averages from summed daily totals, so a weekly point is the exact figure
+for that week and not an average of daily averages.
+
+Scatter traces with ``WEBGL_POINTS`` or more points are drawn with WebGL
+(``Scattergl``), which stays responsive where SVG would slow every redraw.
+
+Settings:
+
+- ``SGJOBDATA_CHART_POINTS``: most points per time-series trace (default 1000)
+- ``SGJOBDATA_WEBGL_POINTS``: scatter size from which WebGL is used (default 100)
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+POINT_BUDGET = int(os.environ.get('SGJOBDATA_CHART_POINTS', '1000'))
+# Resample to a coarser granularity only past this many times the budget;
+# closer to the budget, LTTB keeps more of the daily detail than weekly sums
+RESAMPLE_FACTOR = 4
+WEBGL_POINTS = int(os.environ.get('SGJOBDATA_WEBGL_POINTS', '100'))
+
+# Resampling rule and axis label per granularity, finest first. Weeks start
+# on Monday and are labelled by that Monday.
+GRANULARITIES = {
+    'D': 'Date',
+    'W-MON': 'Week',
+    'MS': 'Month',
+}
+_PERIOD_DAYS = {'D': 1, 'W-MON': 7, 'MS': 30.4}
+
+
+def granularity(start, end, budget=POINT_BUDGET):
+    """The finest resampling rule with at most ``RESAMPLE_FACTOR * budget`` points in a date range."""
+    days = (pd.Timestamp(end) - pd.Timestamp(start)).days + 1
+    for freq, period_days in _PERIOD_DAYS.items():
+        if days / period_days <= RESAMPLE_FACTOR * budget:
+            return freq
+    return 'MS'
+
+
+def lttb(x, y, n_out):
+    """Positions of the ``n_out`` points Largest-Triangle-Three-Buckets keeps.
+
+    The first and last points are always kept. The points in between are
+    split into ``n_out - 2`` equal buckets. From each bucket LTTB keeps the
+    point that forms the largest triangle with the point kept from the
+    previous bucket and the mean of the next bucket.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        if b + 2 < len(edges):
+            next_x, next_y = x[hi:edges[b + 2]].mean(), y[hi:edges[b + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs((x[a] - next_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[b + 1] = a
+    return keep
+
+
+def downsample(frame, x, columns, budget=POINT_BUDGET):
+    """Rows of ``frame`` that LTTB keeps for each of ``columns`` plotted against ``x``.
+
+    Traces that share an x axis (such as stacked fills) keep the union of
+    the rows chosen for each column, so they stay aligned.
+    """
+    if len(frame) <= budget:
+        return frame
+    positions = frame[x].to_numpy(dtype='datetime64[ns]').astype('int64') \
+        if pd.api.types.is_datetime64_any_dtype(frame[x]) else frame[x].to_numpy()
+    keep = np.unique(np.concatenate([lttb(positions, frame[col].to_numpy(), max(budget // len(columns), 3))
+                                     for col in columns]))
+    return frame.iloc[keep]
+
+
+def scatter_trace(n_points, **kwargs):
+    """A ``Scatter`` trace, or ``Scattergl`` when it has ``WEBGL_POINTS`` points or more."""
+    trace = go.Scattergl if n_points >= WEBGL_POINTS else go.Scatter
+    return trace(**kwargs)
+
+
+def render_mode(n_points):
+    """The Plotly Express ``render_mode`` for a scatter or line of ``n_points`` points."""
+    return 'webgl' if n_points >= WEBGL_POINTS else 'svg'
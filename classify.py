@@ -0,0 +1,97 @@
+"""Vectorized tech-job title classification.
+
+Titles are factorized so each distinct title is classified once, all
+keywords are matched in a single compiled regex with word boundaries, and
+the result is broadcast back to the rows as a boolean mask.
+
+A keyword must start at a word boundary. Short keywords (``it``, ``ai``,
+``sql``) must also end at one, so "Digital" and "Retail" are not tech.
+Longer keywords also match as the start of a word, so "Cybersecurity"
+matches ``cyber`` and "Technical" matches ``tech``.
+"""
+import hashlib
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Default tech-related keywords
+TECH_KEYWORDS = ['software', 'developer', 'engineer', 'programmer', 'data scientist', 'analyst',
+                 'architect', 'devops', 'backend', 'frontend', 'fullstack', 'full stack',
+                 'machine learning', 'ai', 'artificial intelligence', 'cyber', 'security',
+                 'cloud', 'database', 'sql', 'python', 'java', 'javascript', 'tech', 'it',
+                 'information technology', 'system', 'network', 'infrastructure']
+
+# Keywords up to this many characters match whole words only (plural and
+# -ing forms included); longer ones also match as word prefixes
+SHORT_KEYWORD_LENGTH = 3
+
+# Bump when the matching rules change, so cached aggregates are rebuilt
+MATCH_RULES_VERSION = 2
+
+# Optional path to a text file with one keyword per line, replacing the defaults
+KEYWORDS_PATH = os.environ.get('SGJOBDATA_TECH_KEYWORDS')
+
+
+def load_tech_keywords(path=KEYWORDS_PATH):
+    """Return the configured keyword list, or the defaults if none is set."""
+    if not path:
+        return list(TECH_KEYWORDS)
+    with open(path) as f:
+        keywords = [line.strip() for line in f]
+    return [kw for kw in keywords if kw and not kw.startswith('#')]
+
+
+def keywords_digest(keywords):
+    """Short identifier of a keyword list and the matching rules, for cache and artifact keys."""
+    text = '\n'.join([f'rules={MATCH_RULES_VERSION}'] + list(keywords))
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+def _alternation(keywords):
+    return '|'.join(re.escape(kw).replace(r'\ ', r'\s+') for kw in keywords)
+
+
+@lru_cache(maxsize=8)
+def _compiled_pattern(keywords):
+    # Longest first so e.g. "javascript" wins over "java" in the alternation
+    alternatives = sorted({kw.lower() for kw in keywords}, key=len, reverse=True)
+    prefixes = [kw for kw in alternatives if len(kw) > SHORT_KEYWORD_LENGTH]
+    words = [kw for kw in alternatives if len(kw) <= SHORT_KEYWORD_LENGTH]
+    # Short keywords are whole words ("it" does not match "digital"), plural and
+    # -ing forms included; longer ones may continue ("cyber" matches "cybersecurity")
+    patterns = []
+    if prefixes:
+        patterns.append(rf'\b(?:{_alternation(prefixes)})')
+    if words:
+        patterns.append(rf'\b(?:{_alternation(words)})(?:s|ing)?\b')
+    return '|'.join(patterns)
+
+
+def tech_title_pattern(keywords=TECH_KEYWORDS):
+    """Return the combined regex used to match any of the keywords."""
+    return _compiled_pattern(tuple(keywords))
+
+
+def classify_titles(titles, keywords=TECH_KEYWORDS):
+    """Return a boolean array that is True for each distinct title that is tech."""
+    titles = pd.Series(titles, dtype='str')
+    if titles.empty or not keywords:
+        return np.zeros(len(titles), dtype=bool)
+    matched = titles.str.contains(tech_title_pattern(keywords), case=False, regex=True)
+    return matched.fillna(False).to_numpy(dtype=bool)
+
+
+def tech_title_mask(titles, keywords=TECH_KEYWORDS):
+    """Boolean mask of tech rows, classifying each distinct title only once."""
+    codes, uniques = pd.factorize(titles)
+    matched = classify_titles(uniques, keywords)
+    # Missing titles get code -1 and are never tech
+    mask = np.zeros(len(codes), dtype=bool)
+    present = codes >= 0
+    mask[present] = matched[codes[present]]
+    if isinstance(titles, pd.Series):
+        return pd.Series(mask, index=titles.index, name=titles.name)
+    return mask
@@ -0,0 +1,158 @@
+"""Sparse day x key matrices for date-windowed rankings.
+
+A ``DayMatrix`` stores per-(day, key) sums, such as postings per company per
+day, in CSR layout with one row per day. Because the entries are ordered by
+day, the entries before ``indptr[j]`` are the cumulative sum up to day
+``j``. A window ``[i, j)`` is therefore the difference of two cumulative
+rows. It is computed with one ``bincount`` over the contiguous entry slice,
+so the cost depends only on the non-zeros in the window and never on the
+total number of keys x days. That product would be far too large to store
+densely with hundreds of thousands of titles.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def day_key_sums(day, key, values):
+    """Group row-aligned ``values`` by (day, key) into a mergeable sums frame.
+
+    ``key`` may be a single array or a list of arrays for a composite key.
+    Rows with a missing day or key are dropped, as in a pandas groupby.
+    """
+    keys = key if isinstance(key, list) else [key]
+    frame = pd.DataFrame(values)
+    group_cols = ['day'] + [f'key{level}' for level in range(len(keys))]
+    frame['day'] = np.asarray(day)
+    for level, key_values in enumerate(keys):
+        # Categorical keys are grouped on their codes without materializing strings
+        if isinstance(getattr(key_values, 'dtype', None), pd.CategoricalDtype):
+            frame[f'key{level}'] = pd.Categorical(key_values)
+        else:
+            frame[f'key{level}'] = np.asarray(key_values, dtype=object)
+    return frame.groupby(group_cols, sort=False, observed=True).sum()
+
+
+class DayMatrix:
+    """Per-(day, key) sums in CSR layout over a fixed, sorted day index."""
+
+    def __init__(self, days, keys, indptr, key_codes, values):
+        self.days = days
+        self.keys = keys
+        self.indptr = indptr
+        self.key_codes = key_codes
+        self.values = values
+
+    @staticmethod
+    def _day_keys(sums, days):
+        # Day position and (object) key of every row of a sums frame
+        day_pos = days.get_indexer(pd.DatetimeIndex(sums.index.get_level_values(0)))
+        if sums.index.nlevels == 2:
+            key_index = sums.index.get_level_values(1).astype(object)
+        else:
+            key_index = pd.MultiIndex.from_arrays(
+                [sums.index.get_level_values(level).astype(object) for level in range(1, sums.index.nlevels)])
+        return day_pos, key_index
+
+    @classmethod
+    def from_sums(cls, sums, days):
+        """Build from a ``day_key_sums`` frame (or a concatenation of several)."""
+        # Partials from several sources may repeat (day, key) pairs
+        if not sums.index.is_unique:
+            sums = sums.groupby(level=list(range(sums.index.nlevels))).sum()
+        day_pos, key_index = cls._day_keys(sums, days)
+        # Keys are sorted lexically, whatever the category order of the sources
+        key_codes, keys = pd.factorize(key_index, sort=True)
+
+        order = np.lexsort((key_codes, day_pos))
+        day_pos = day_pos[order]
+        indptr = np.searchsorted(day_pos, np.arange(len(days) + 1), side='left')
+        values = {name: sums[name].to_numpy()[order] for name in sums.columns}
+        return cls(days, keys, indptr, key_codes[order].astype(np.int32), values)
+
+    def extend(self, sums, days):
+        """A matrix with the rows of ``sums`` appended as new days.
+
+        ``days`` must start with ``self.days``, and every day in ``sums`` must
+        come after them. The existing rows are reused as they are: only the new
+        entries are sorted, and existing key codes are remapped only when new
+        keys appear. ``self`` is left unchanged.
+        """
+        if not sums.index.is_unique:
+            sums = sums.groupby(level=list(range(sums.index.nlevels))).sum()
+        day_pos, key_index = self._day_keys(sums, days)
+        n_old = len(self.days)
+        if len(day_pos) and day_pos.min() < n_old:
+            raise ValueError('extend only appends days after the existing ones')
+        keys, old_codes = self.keys, self.key_codes
+        new_keys = key_index.unique().difference(keys)
+        if len(new_keys):
+            keys = keys.append(new_keys).sort_values()
+            old_codes = keys.get_indexer(self.keys).astype(np.int32)[self.key_codes]
+        key_codes = keys.get_indexer(key_index)
+
+        order = np.lexsort((key_codes, day_pos))
+        day_pos = day_pos[order]
+        indptr = np.concatenate([self.indptr[:n_old],
+                                 self.nnz + np.searchsorted(day_pos, np.arange(n_old, len(days) + 1), side='left')])
+        values = {name: np.concatenate([self.values[name], sums[name].to_numpy()[order]]) for name in self.values}
+        return DayMatrix(days, keys, indptr, np.concatenate([old_codes, key_codes[order].astype(np.int32)]), values)
+
+    def save(self, directory):
+        """Write the matrix as .npy arrays (memory-mappable) plus a Parquet key table."""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'indptr.npy'), self.indptr)
+        np.save(os.path.join(directory, 'key_codes.npy'), self.key_codes)
+        for name, values in self.values.items():
+            np.save(os.path.join(directory, f'values.{name}.npy'), values)
+        keys = self.keys.to_frame(index=False) if isinstance(self.keys, pd.MultiIndex) else pd.DataFrame({'key0': self.keys})
+        keys.to_parquet(os.path.join(directory, 'keys.parquet'), index=False)
+
+    @classmethod
+    def load(cls, directory, days, mmap_mode='r'):
+        """Read a matrix written by ``save``; the arrays are memory-mapped by default."""
+        def array(name):
+            return np.load(os.path.join(directory, name), mmap_mode=mmap_mode)
+        keys = pd.read_parquet(os.path.join(directory, 'keys.parquet'))
+        keys = pd.Index(keys.iloc[:, 0]) if keys.shape[1] == 1 else pd.MultiIndex.from_frame(keys)
+        values = {name[len('values.'):-len('.npy')]: array(name)
+                  for name in sorted(os.listdir(directory)) if name.startswith('values.')}
+        return cls(days, keys, array('indptr.npy'), array('key_codes.npy'), values)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def nnz(self):
+        return len(self.key_codes)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the arrays and the key index."""
+        arrays = [self.indptr, self.key_codes, *self.values.values()]
+        return sum(array.nbytes for array in arrays) + self.keys.memory_usage(deep=True)
+
+    def window(self, i, j, columns=None):
+        """Per-key totals over day positions ``[i, j)``, as dense arrays."""
+        lo, hi = self.indptr[i], self.indptr[j]
+        codes = self.key_codes[lo:hi]
+        columns = self.values if columns is None else columns
+        return {name: np.bincount(codes, weights=self.values[name][lo:hi], minlength=len(self.keys))
+                for name in columns}
+
+    def top(self, totals, n, by):
+        """Indices of the ``n`` largest keys by ``totals[by]``, largest first.
+
+        Keys with a zero total are skipped; ties are broken by key order.
+        """
+        scores = totals[by]
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > n:
+            # Linear-time selection of the n-th largest score; only keys at or
+            # above it are sorted, so ties at the cut-off also follow key order
+            kth = len(candidates) - n
+            threshold = np.partition(scores[candidates], kth)[kth]
+            candidates = candidates[scores[candidates] >= threshold]
+        order = np.lexsort((candidates, -scores[candidates]))[:n]
+        return candidates[order]
@@ -0,0 +1,248 @@
+"""Per-stage timing, row counts and memory deltas for dashboard reruns.
+
+``app.py`` starts a ``Recorder`` at the top of every rerun. Code anywhere in
+the pipeline wraps its steps in ``stage(name)``; when no recorder is active
+(tests, the CLI, worker processes) a stage costs one context-variable lookup.
+Each stage records wall time, an optional row count and the change in
+resident memory. Stages nest, so the build steps show up under the cached
+``load_aggregates`` call on the rerun that actually builds the store.
+
+On demand, one rerun is profiled with cProfile (or pyinstrument if it is
+installed). The profile is written to ``PROFILE_DIR``, which keeps only the
+newest ``PROFILE_KEEP`` profiles. Profiles expose server paths and cost disk
+space, so they are only taken when the diagnostics are enabled on the server
+or the request carries the configured token.
+
+Settings:
+
+- ``?diagnostics=1`` in the URL (or ``SGJOBDATA_DIAGNOSTICS=1``) shows the
+  diagnostics expander at the bottom of the dashboard
+- ``?profile=1`` (or ``?profile=pyinstrument``) profiles the next rerun, if
+  ``SGJOBDATA_DIAGNOSTICS=1`` is set or ``&profile_token=`` matches
+  ``SGJOBDATA_PROFILE_TOKEN``
+- ``SGJOBDATA_PROFILE_KEEP=n`` sets how many profiles are kept (default 20)
+- ``SGJOBDATA_DIAGNOSTICS_LOG=path`` appends one JSON line per rerun
+"""
+import contextvars
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from ingest import CACHE_DIR
+
+DIAGNOSTICS = os.environ.get('SGJOBDATA_DIAGNOSTICS', '') not in ('', '0')
+LOG_PATH = os.environ.get('SGJOBDATA_DIAGNOSTICS_LOG')
+PROFILE_DIR = os.environ.get('SGJOBDATA_PROFILE_DIR', os.path.join(CACHE_DIR, 'profiles'))
+PROFILE_TOKEN = os.environ.get('SGJOBDATA_PROFILE_TOKEN', '')
+PROFILE_KEEP = max(int(os.environ.get('SGJOBDATA_PROFILE_KEEP', '20')), 1)
+
+_current = contextvars.ContextVar('diagnostics_recorder', default=None)
+_log_lock = threading.Lock()
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def profiling_allowed(token=None):
+    """Whether a rerun may be profiled on request, given the request's ``profile_token``."""
+    if DIAGNOSTICS:
+        return True
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(str(token or '').encode(), PROFILE_TOKEN.encode())
+
+
+def prune_profiles(directory=PROFILE_DIR, keep=PROFILE_KEEP):
+    """Remove all but the newest ``keep`` profiles from ``directory``."""
+    try:
+        names = [name for name in os.listdir(directory) if name.startswith('rerun-')]
+    except FileNotFoundError:
+        return
+    paths = [os.path.join(directory, name) for name in names]
+    mtimes = {}
+    for path in paths:
+        try:
+            mtimes[path] = os.stat(path).st_mtime_ns
+        except FileNotFoundError:  # pruned by another session meanwhile
+            pass
+    for path in sorted(mtimes, key=mtimes.get, reverse=True)[keep:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def rss_bytes():
+    """Current resident set size of the process, or None where it is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StageRecord:
+    """One timed stage; set ``rows`` inside the ``with`` block if it is known only then."""
+    __slots__ = ('name', 'depth', 'rows', 'seconds', 'rss_delta')
+
+    def __init__(self, name, depth, rows=None):
+        self.name = name
+        self.depth = depth
+        self.rows = rows
+        self.seconds = None
+        self.rss_delta = None
+
+    def as_dict(self):
+        return {'stage': self.name, 'depth': self.depth, 'seconds': self.seconds,
+                'rows': self.rows, 'rss_delta': self.rss_delta}
+
+
+class _NullStage:
+    """Stand-in for ``StageRecord`` when nothing is recording."""
+    rows = None
+
+    def __setattr__(self, name, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Recorder:
+    """Stages recorded during one rerun, in the order they started."""
+
+    def __init__(self, profile=None):
+        self.stages = []
+        self.profile = profile
+        self.profile_path = None
+        self.profile_text = None
+        self._depth = 0
+        self._profiler = None
+        self._token = None
+        self._started = None
+        self.seconds = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._token = _current.set(self)
+        if self.profile == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:  # optional dependency; fall back to cProfile
+                self.profile = 'cprofile'
+            else:
+                self._profiler = Profiler()
+                self._profiler.start()
+        if self.profile and self._profiler is None:
+            self.profile = 'cprofile'
+            self._profiler = cProfile.Profile()
+            try:
+                self._profiler.enable()
+            except ValueError:
+                # Another profiler is already active in this process
+                self._profiler = self.profile = None
+        return self
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        record = StageRecord(name, self._depth, rows)
+        self.stages.append(record)
+        self._depth += 1
+        rss = rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - start
+            if rss is not None:
+                record.rss_delta = rss_bytes() - rss
+            self._depth -= 1
+
+    def finish(self, log_path=LOG_PATH, context=None):
+        """Stop recording (and profiling), and append the rerun to the JSON log.
+
+        Only the first call has an effect, so it is safe in a ``finally`` block.
+        """
+        if self._started is None or self.seconds is not None:
+            return self
+        self.seconds = time.perf_counter() - self._started
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+        if self._profiler is not None:
+            profiler, self._profiler = self._profiler, None
+            # Stop the profiler before anything that may fail, such as writing the profile
+            if self.profile == 'cprofile':
+                profiler.disable()
+            else:
+                profiler.stop()
+            self._save_profile(profiler)
+        if log_path:
+            self.write_log(log_path, context)
+        return self
+
+    def _save_profile(self, profiler):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        if self.profile == 'cprofile':
+            self.profile_path = os.path.join(PROFILE_DIR, f'rerun-{stamp}-{os.getpid()}.prof')
+            profiler.dump_stats(self.profile_path)
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(30)
+            self.profile_text = out.getvalue()
+        else:
+            self.profile_path = os.path.join(PROFILE_DIR, f'rerun-{stamp}-{os.getpid()}.html')
+            with open(self.profile_path, 'w') as f:
+                f.write(profiler.output_html())
+            self.profile_text = profiler.output_text()
+        prune_profiles(PROFILE_DIR, PROFILE_KEEP)
+
+    def frame(self):
+        """The recorded stages as a table, indented by nesting depth."""
+        frame = pd.DataFrame([record.as_dict() for record in self.stages],
+                             columns=['stage', 'depth', 'seconds', 'rows', 'rss_delta'])
+        # Non-breaking spaces, so the indentation survives in the rendered table
+        frame['stage'] = ['\u00a0\u00a0' * depth + name for depth, name in zip(frame['depth'], frame['stage'])]
+        frame['ms'] = frame['seconds'] * 1000
+        frame['rss_delta_mib'] = frame['rss_delta'] / 2**20
+        return frame[['stage', 'ms', 'rows', 'rss_delta_mib']]
+
+    def as_dict(self, context=None):
+        return {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'pid': os.getpid(),
+            'seconds': self.seconds,
+            'rss': rss_bytes(),
+            'context': context or {},
+            'profile': self.profile_path,
+            'stages': [record.as_dict() for record in self.stages],
+        }
+
+    def write_log(self, log_path, context=None):
+        line = json.dumps(self.as_dict(context), default=str) + '\n'
+        with _log_lock:
+            with open(log_path, 'a') as f:
+                f.write(line)
+
+
+def current():
+    """The recorder of the rerun running in this thread, if any."""
+    return _current.get()
+
+
+def stage(name, rows=None):
+    """Time a step of the current rerun; a no-op context when nothing is recording."""
+    recorder = _current.get()
+    if recorder is None:
+        return _NULL_STAGE
+    return recorder.stage(name, rows)
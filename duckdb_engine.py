@@ -0,0 +1,215 @@
+"""Optional DuckDB engine for the dashboard aggregations.
+
+The pandas engine loads the postings into a frame and groups them there.
+This engine runs the same per-day groupbys as SQL in an embedded DuckDB
+database, which scans the CSV (or a Parquet file) itself, in parallel on
+every core, without materializing the postings in pandas. It returns the
+same partial aggregates as ``aggregates.partial_aggregates``, so the rest
+of the pipeline (``store_from_partials``, artifacts, the dashboard) is
+shared between the engines.
+
+Two steps stay in Python so both engines use one definition of them. The
+tech-title classifier runs once per distinct title, and ``categories``
+strings are parsed once per distinct string. Their results are joined into
+the query as small lookup tables.
+
+Select the engine with ``SGJOBDATA_ENGINE=duckdb`` (or ``--engine duckdb``
+for ``python -m pipeline``). It requires the ``duckdb`` package.
+"""
+import os
+
+import pandas as pd
+
+from aggregates import store_from_partials
+from categories import UNKNOWN_SECTOR, parse_categories, primary_sector
+from classify import TECH_KEYWORDS, classify_titles
+from day_matrix import day_key_sums
+from ingest import DATA_PATH, DATE_COLUMNS, DATE_FORMAT, USECOLS
+from quantile_sketch import bucket_index
+
+try:
+    import duckdb
+except ImportError:  # optional dependency
+    duckdb = None
+
+ENGINES = ('pandas', 'duckdb')
+
+# Aggregation engine for a single CSV source: 'pandas' (default) or 'duckdb'
+ENGINE = os.environ.get('SGJOBDATA_ENGINE', 'pandas')
+
+FLOAT_COLUMNS = ['metadata_repostCount', 'numberOfVacancies', 'salary_minimum', 'salary_maximum']
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _scan(source_path):
+    # CSVs are read as text and typed below exactly as ingest.py types them
+    literal = "'" + source_path.replace("'", "''") + "'"
+    if source_path.endswith('.parquet'):
+        return f'read_parquet({literal})'
+    return f'read_csv({literal}, header=true, all_varchar=true)'
+
+
+def _postings_query(con, source_path):
+    """SELECT producing the typed dashboard columns of every posting."""
+    scan = _scan(source_path)
+    available = {row[0]: row[1] for row in con.execute(f'DESCRIBE SELECT * FROM {scan}').fetchall()}
+    columns = []
+    for name in USECOLS:
+        column = _quote(name)
+        if name not in available:
+            expr = 'NULL'
+        elif name in DATE_COLUMNS:
+            expr = (f"try_strptime({column}, '{DATE_FORMAT}')" if available[name] == 'VARCHAR'
+                    else f'CAST({column} AS TIMESTAMP)')
+        elif name in FLOAT_COLUMNS:
+            # float32 like the pandas engine, summed as double
+            expr = f'CAST(TRY_CAST({column} AS FLOAT) AS DOUBLE)'
+        else:
+            expr = f'CAST({column} AS VARCHAR)'
+        columns.append(f'{expr} AS {_quote(name)}')
+    return f'SELECT {", ".join(columns)} FROM {scan}'
+
+
+def _register_lookups(con, keywords):
+    # Tech flag per distinct title; primary sector and every listed category per distinct categories string
+    titles = con.execute('SELECT DISTINCT title FROM postings WHERE title IS NOT NULL').df()['title']
+    con.register('title_lookup', pd.DataFrame({'title': titles, 'is_tech': classify_titles(titles, keywords)}))
+    strings = con.execute('SELECT DISTINCT categories FROM postings WHERE categories IS NOT NULL').df()['categories']
+    con.register('sector_lookup', pd.DataFrame({
+        'categories': strings,
+        'sector': [primary_sector(value) for value in strings],
+    }))
+    listed = [(value, name) for value in strings for name in dict.fromkeys(name for _, name in parse_categories(value))]
+    con.register('category_lookup', pd.DataFrame(listed, columns=['categories', 'category']))
+
+
+TECH_JOBS = f"""
+CREATE TEMP TABLE tech AS
+SELECT
+    date_trunc('day', p.metadata_newPostingDate) AS day,
+    p.metadata_jobPostId IS NOT NULL AS has_id,
+    p.postedCompany_name AS company,
+    p.title,
+    p.categories,
+    coalesce(s.sector, '{UNKNOWN_SECTOR}') AS sector,
+    p.numberOfVacancies AS vacancies,
+    p.salary_minimum AS salary_min,
+    p.salary_maximum AS salary_max,
+    p.metadata_repostCount AS repost,
+    CAST(date_diff('day', CAST(p.metadata_originalPostingDate AS DATE),
+                   CAST(p.metadata_newPostingDate AS DATE)) AS DOUBLE) AS recency
+FROM postings p
+JOIN title_lookup t ON p.title = t.title
+LEFT JOIN sector_lookup s ON p.categories = s.categories
+WHERE t.is_tech AND p.metadata_newPostingDate IS NOT NULL
+"""
+
+DAILY = """
+SELECT
+    day AS "Date",
+    count(*) AS "rows",
+    count(*) FILTER (has_id) AS postings,
+    coalesce(sum(vacancies), 0) AS vacancies,
+    count(*) FILTER (salary_min IS NOT NULL AND salary_max IS NOT NULL) AS salary_n,
+    coalesce(sum(salary_min) FILTER (salary_max IS NOT NULL), 0) AS salary_min_sum,
+    coalesce(sum(salary_max) FILTER (salary_min IS NOT NULL), 0) AS salary_max_sum,
+    count(repost) AS repost_n,
+    coalesce(sum(repost), 0) AS repost_sum,
+    count(recency) AS recency_n,
+    coalesce(sum(recency), 0) AS recency_sum
+FROM tech GROUP BY day ORDER BY day
+"""
+
+COMPANY = """
+SELECT day, company AS key0, count(*) FILTER (has_id) AS postings
+FROM tech WHERE company IS NOT NULL GROUP BY ALL
+"""
+
+TITLE = """
+SELECT day, title AS key0,
+    count(*) FILTER (has_id) AS postings,
+    count(salary_min) AS salary_min_n,
+    coalesce(sum(salary_min), 0) AS salary_min_sum,
+    count(salary_max) AS salary_max_n,
+    coalesce(sum(salary_max), 0) AS salary_max_sum
+FROM tech GROUP BY ALL
+"""
+
+SECTOR = """
+SELECT day, sector AS key0,
+    count(*) AS "rows",
+    count(*) FILTER (has_id) AS postings,
+    count(recency) AS recency_n,
+    coalesce(sum(recency), 0) AS recency_sum
+FROM tech GROUP BY ALL
+"""
+
+# Every category listed on a posting, 'Unknown' if it lists none
+CATEGORY = f"""
+SELECT day, coalesce(c.category, '{UNKNOWN_SECTOR}') AS key0,
+    count(*) AS "rows",
+    count(*) FILTER (has_id) AS postings
+FROM tech LEFT JOIN category_lookup c ON tech.categories = c.categories GROUP BY ALL
+"""
+
+SECTOR_TITLE = """
+SELECT day, sector AS key0, title AS key1, count(*) FILTER (has_id) AS postings
+FROM tech GROUP BY ALL
+"""
+
+# Exact salary values per (day, sector); bucketed in numpy so the buckets
+# match quantile_sketch.bucket_index bit for bit
+SALARY_VALUES = """
+SELECT day, sector, {column} AS value, count(*) AS "count"
+FROM tech WHERE {column} IS NOT NULL GROUP BY ALL
+"""
+
+
+def _sums(con, query, n_keys):
+    frame = con.execute(query).df()
+    frame['day'] = pd.to_datetime(frame['day'])
+    return frame.set_index(['day'] + [f'key{level}' for level in range(n_keys)])
+
+
+def _sketch_sums(con, column):
+    frame = con.execute(SALARY_VALUES.format(column=column)).df()
+    return day_key_sums(pd.to_datetime(frame['day']), [frame['sector'], bucket_index(frame['value'])], {
+        'count': frame['count'].to_numpy(dtype='int64'),
+    })
+
+
+def duckdb_partials(source_path=DATA_PATH, keywords=TECH_KEYWORDS, threads=None):
+    """Partial aggregates of a CSV or Parquet file, computed in DuckDB."""
+    if duckdb is None:
+        raise ImportError("the 'duckdb' engine requires the duckdb package (pip install duckdb)")
+    con = duckdb.connect()
+    try:
+        if threads:
+            con.execute(f'SET threads = {int(threads)}')
+        con.execute(f'CREATE TEMP VIEW postings AS {_postings_query(con, source_path)}')
+        _register_lookups(con, keywords)
+        con.execute(TECH_JOBS)
+
+        daily = con.execute(DAILY).df()
+        daily['Date'] = pd.to_datetime(daily['Date'])
+        daily = daily.set_index(pd.DatetimeIndex(daily.pop('Date'), name='Date'))
+        return {
+            'daily': daily,
+            'company': _sums(con, COMPANY, 1),
+            'title': _sums(con, TITLE, 1),
+            'sector': _sums(con, SECTOR, 1),
+            'category': _sums(con, CATEGORY, 1),
+            'sector_title': _sums(con, SECTOR_TITLE, 2),
+            'salary_min_sketch': _sketch_sums(con, 'salary_min'),
+            'salary_max_sketch': _sketch_sums(con, 'salary_max'),
+        }
+    finally:
+        con.close()
+
+
+def duckdb_aggregates(source_path=DATA_PATH, keywords=TECH_KEYWORDS, threads=None):
+    """Build the ``AggregateStore`` with the DuckDB engine."""
+    return store_from_partials(duckdb_partials(source_path, keywords, threads))
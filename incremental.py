@@ -0,0 +1,282 @@
+"""Incremental refresh from a directory of append-only partitions.
+
+New job-posting extracts arrive as separate files, e.g. one CSV per day,
+in ``PARTITIONS_DIR``. Only partitions that have not been seen yet are read.
+Their rows are deduplicated by ``metadata_jobPostId`` against everything
+already processed, so a repost of an earlier posting is counted once. The
+rows are then reduced to partial aggregates and merged into a persisted
+state.
+
+The state holds the same mergeable per-day sums as
+``aggregates.partial_aggregates``, stored in one Parquet file per aggregate
+and month. A refresh only merges and rewrites the months its new rows touch,
+so its cost scales with the delta rather than the full history. Reposts are
+looked up in a sorted set of id hashes without re-sorting it, and the
+``AggregateStore`` is extended with the new days instead of being rebuilt
+(unless a partition adds rows to days that are already in it). Partitions
+are append-only. If a processed file changes or disappears, the state is
+rebuilt from scratch.
+
+Each merged partition is one transaction. Its months are written to new
+files tagged with a generation number, and the merge is committed by
+replacing ``manifest.json``, which lists every month file and seen-id file
+the state consists of. Files the manifest does not list are ignored and
+cleaned up, so a refresh that fails or is killed part-way leaves the last
+committed state intact and the partition is merged again on the next one.
+"""
+import glob
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+from aggregates import extend_store, merge_sums, partial_aggregates, prepare_tech_jobs, store_from_partials
+from classify import TECH_KEYWORDS, keywords_digest
+from ingest import CACHE_DIR, DTYPES, parse_dates, read_source_csv, write_atomic
+
+PARTITIONS_DIR = os.environ.get('SGJOBDATA_PARTITIONS_DIR')
+STATE_DIR = os.path.join(CACHE_DIR, 'incremental')
+
+# Bump when the persisted layout or the partial aggregates change
+STATE_VERSION = 3
+
+
+def list_partitions(partitions_dir):
+    """Partition files in processing order (sorted by name)."""
+    return sorted(glob.glob(os.path.join(partitions_dir, '*.csv')))
+
+
+def _partition_fingerprint(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def partitions_version(partitions_dir):
+    """Short identifier that changes whenever a partition is added or modified."""
+    digest = hashlib.blake2b(digest_size=8)
+    for path in list_partitions(partitions_dir):
+        digest.update(json.dumps([os.path.basename(path), _partition_fingerprint(path)]).encode())
+    return f'p{STATE_VERSION}-{digest.hexdigest()}'
+
+
+def _hash_ids(ids):
+    # 64-bit hashes keep the seen-id set compact; collisions are negligible
+    return pd.util.hash_array(np.asarray(ids, dtype=object)).astype(np.uint64)
+
+
+def _sorted_member(sorted_ids, ids):
+    positions = np.searchsorted(sorted_ids, ids)
+    return (positions < len(sorted_ids)) & (sorted_ids[np.minimum(positions, len(sorted_ids) - 1)] == ids) \
+        if len(sorted_ids) else np.zeros(len(ids), dtype=bool)
+
+
+class SeenIds:
+    """Set of 64-bit id hashes with membership checks and appends that scale with the delta.
+
+    The ids are a large sorted array plus a small sorted tail. A lookup is a
+    binary search in each. New ids go into the tail, which is merged into the
+    large array once it holds more than ``1 / TAIL_RATIO`` of it, so the
+    large array is rewritten a logarithmic number of times overall.
+    """
+    TAIL_RATIO = 8
+
+    def __init__(self, ids=()):
+        self._ids = np.unique(np.asarray(ids, dtype=np.uint64))
+        self._tail = np.zeros(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self._ids) + len(self._tail)
+
+    def contains(self, ids):
+        """Boolean array: which of ``ids`` are in the set."""
+        ids = np.asarray(ids, dtype=np.uint64)
+        return _sorted_member(self._ids, ids) | _sorted_member(self._tail, ids)
+
+    def add(self, ids):
+        """Add ids that are not in the set yet."""
+        self._tail = np.union1d(self._tail, np.asarray(ids, dtype=np.uint64))
+        if len(self._tail) * self.TAIL_RATIO > len(self._ids):
+            # Two sorted runs: the stable sort merges them in linear time
+            self._ids = np.sort(np.concatenate([self._ids, self._tail]), kind='stable')
+            self._tail = np.zeros(0, dtype=np.uint64)
+
+
+def _empty_partials():
+    empty = parse_dates(pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in DTYPES.items()}))
+    tech_df = prepare_tech_jobs(empty)
+    return partial_aggregates(tech_df)
+
+
+def _save_array(path, array):
+    with open(path, 'wb') as f:
+        np.save(f, array)
+
+
+def _save_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _split_by_month(frame):
+    months = frame.index.get_level_values(0).to_numpy(dtype='datetime64[M]')
+    return {pd.Timestamp(month).strftime('%Y-%m'): part for month, part in frame.groupby(months, sort=False)}
+
+
+class IncrementalState:
+    """Persisted partial aggregates plus the ids and partitions already merged."""
+
+    def __init__(self, state_dir=STATE_DIR, keywords=TECH_KEYWORDS):
+        self.state_dir = state_dir
+        self.keywords = list(keywords)
+        self.lock = threading.Lock()
+        self._load()
+
+    def _manifest_path(self):
+        return os.path.join(self.state_dir, 'manifest.json')
+
+    def _expected_header(self):
+        return {'version': STATE_VERSION, 'keywords': keywords_digest(self.keywords)}
+
+    def _load(self):
+        try:
+            with open(self._manifest_path()) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = None
+        if not manifest or manifest.get('header') != self._expected_header():
+            self._reset()
+            return
+        self.generation = manifest['generation']
+        self.partitions = manifest['partitions']
+        self.month_files = manifest['months']
+        self.months = {name: {month: pd.read_parquet(os.path.join(self.state_dir, path))
+                              for month, path in files.items()}
+                       for name, files in self.month_files.items()}
+        self.seen_files = manifest['seen']
+        seen = [np.load(os.path.join(self.state_dir, path)) for path in self.seen_files]
+        self.seen_ids = SeenIds(np.concatenate(seen) if seen else ())
+        self._store = None
+        self._remove_unlisted()
+
+    def _remove_unlisted(self):
+        # Month files of a merge that was never committed. Later generations may belong to
+        # a merge in progress; a failed one is overwritten when the merge is retried.
+        listed = {path for files in self.month_files.values() for path in files.values()}
+        for path in glob.glob(os.path.join(self.state_dir, 'partials', '*', '*.g*.parquet')):
+            relative = os.path.relpath(path, self.state_dir)
+            generation = int(path.rsplit('.g', 1)[1].split('.')[0])
+            if relative not in listed and generation <= self.generation:
+                _remove(path)
+
+    def _reset(self):
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+        self.generation = 0
+        self.partitions = {}
+        self.month_files = {}
+        self.seen_files = []
+        self.months = {}
+        self.seen_ids = SeenIds()
+        self._store = None
+
+    def refresh(self, partitions_dir=PARTITIONS_DIR):
+        """Merge every new partition into the state; returns how many were merged."""
+        with self.lock:
+            current = {os.path.basename(path): path for path in list_partitions(partitions_dir)}
+            for name, fingerprint in self.partitions.items():
+                if name not in current or _partition_fingerprint(current[name]) != fingerprint:
+                    # Append-only contract broken: start again from all partitions
+                    self._reset()
+                    break
+            new = [name for name in current if name not in self.partitions]
+            try:
+                for name in new:
+                    self._merge_partition(name, current[name])
+            except BaseException:
+                # Back to the last committed state; uncommitted files are removed
+                self._load()
+                raise
+            return len(new)
+
+    def _merge_partition(self, name, path):
+        fingerprint = _partition_fingerprint(path)
+        tech_df = prepare_tech_jobs(read_source_csv(path), self.keywords)
+
+        # Drop reposts of postings already merged, and repeats within this partition
+        ids = tech_df['metadata_jobPostId']
+        hashes = _hash_ids(ids.fillna(''))
+        has_id = ids.notna().to_numpy()
+        seen = self.seen_ids.contains(hashes) & has_id
+        repeated = pd.Series(hashes).duplicated().to_numpy() & has_id
+        tech_df = tech_df[~(seen | repeated)]
+        new_ids = np.unique(hashes[has_id & ~seen])
+
+        # Merge into copies, so the state in memory only changes once the merge is committed
+        generation = self.generation + 1
+        months = dict(self.months)
+        month_files = dict(self.month_files)
+        delta = partial_aggregates(tech_df)
+        for agg_name, frame in delta.items():
+            months[agg_name] = dict(months.get(agg_name, {}))
+            month_files[agg_name] = dict(month_files.get(agg_name, {}))
+            directory = os.path.join(self.state_dir, 'partials', agg_name)
+            os.makedirs(directory, exist_ok=True)
+            for month, part in _split_by_month(frame).items():
+                merged = merge_sums([months[agg_name].get(month), part])
+                path = os.path.join('partials', agg_name, f'{month}.g{generation}.parquet')
+                write_atomic(os.path.join(self.state_dir, path), merged.to_parquet)
+                months[agg_name][month] = merged
+                month_files[agg_name][month] = path
+        seen_path = os.path.join('seen', f'{name}.npy')
+        os.makedirs(os.path.join(self.state_dir, 'seen'), exist_ok=True)
+        write_atomic(os.path.join(self.state_dir, seen_path), lambda tmp: _save_array(tmp, new_ids))
+        seen_files = self.seen_files + [seen_path]
+
+        # Commit: the new manifest replaces the old one in a single step
+        partitions = {**self.partitions, name: fingerprint}
+        manifest = {'header': self._expected_header(), 'generation': generation,
+                    'partitions': partitions, 'months': month_files, 'seen': seen_files}
+        write_atomic(self._manifest_path(), lambda tmp: _save_json(tmp, manifest))
+        replaced = [os.path.join(self.state_dir, files[month])
+                    for agg_name, files in self.month_files.items()
+                    for month in files if month_files[agg_name][month] != files[month]]
+        self.generation, self.partitions = generation, partitions
+        self.months, self.month_files, self.seen_files = months, month_files, seen_files
+        self.seen_ids.add(new_ids)
+        if self._store is not None:
+            # None when the partition added to days already in the store: rebuilt on demand
+            self._store = extend_store(self._store, delta)
+        for path in replaced:
+            _remove(path)
+
+    def partials(self):
+        """The merged partial aggregates over every partition."""
+        if not self.partitions:
+            raise ValueError('no partitions have been merged yet')
+        # Aggregates with no rows yet (e.g. no salaries) still need an empty frame
+        partials = _empty_partials()
+        for name, months in self.months.items():
+            if months:
+                partials[name] = pd.concat(list(months.values()))
+        return partials
+
+    def store(self):
+        """The ``AggregateStore`` of the current state.
+
+        It is built once and then extended by each refresh, so this is cheap
+        after the first call.
+        """
+        with self.lock:
+            if self._store is None:
+                self._store = store_from_partials(self.partials())
+            return self._store
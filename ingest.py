@@ -0,0 +1,194 @@
+"""Columnar ingest layer for the SGJobData CSV.
+
+The first load parses only the columns the dashboard uses, with explicit
+dtypes and a fixed date format, and writes the result to a Parquet file.
+Later loads read that file directly. The cache is keyed by the CSV's size,
+mtime and content hash, so replacing the CSV rebuilds it automatically.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+
+import pandas as pd
+
+DATA_PATH = os.environ.get('SGJOBDATA_CSV', 'SGJobData.csv')
+CACHE_DIR = os.environ.get('SGJOBDATA_CACHE_DIR', '.cache')
+
+# Bump when USECOLS/DTYPES/date handling change so old caches are rebuilt
+CACHE_VERSION = 2
+
+DATE_FORMAT = '%Y-%m-%d'
+DATE_COLUMNS = ['metadata_newPostingDate', 'metadata_originalPostingDate']
+
+# Only the columns the dashboard reads, with the dtype each one is parsed as.
+# Titles and company names repeat heavily, so they are categorical; counts and
+# salaries fit float32 (aggregates sum them in float64).
+DTYPES = {
+    'categories': 'str',
+    'metadata_jobPostId': 'str',
+    'metadata_newPostingDate': 'str',
+    'metadata_originalPostingDate': 'str',
+    'metadata_repostCount': 'float32',
+    'numberOfVacancies': 'float32',
+    'postedCompany_name': 'category',
+    'salary_minimum': 'float32',
+    'salary_maximum': 'float32',
+    'title': 'category',
+}
+USECOLS = list(DTYPES)
+
+
+def source_columns(csv_path):
+    """Return the dashboard columns that are present in the CSV header."""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    return [col for col in USECOLS if col in header]
+
+
+def parse_dates(df):
+    """Parse the posting date columns in place using the fixed date format."""
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], format=DATE_FORMAT, errors='coerce')
+    return df
+
+
+def read_source_csv(csv_path):
+    """Read the CSV directly, skipping unused columns and guessing nothing."""
+    columns = source_columns(csv_path)
+    df = pd.read_csv(csv_path, usecols=columns,
+                     dtype={col: DTYPES[col] for col in columns},
+                     engine='pyarrow')
+    return parse_dates(df)
+
+
+def read_source_range(csv_path, start, end):
+    """Parse the rows stored in bytes ``[start, end)`` of the CSV.
+
+    The range must begin and end on row boundaries; the header line is
+    prepended so the columns are typed exactly as in ``read_source_csv``.
+    """
+    columns = source_columns(csv_path)
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        f.seek(start)
+        body = f.read(end - start)
+    df = pd.read_csv(io.BytesIO(header + body), usecols=columns,
+                     dtype={col: DTYPES[col] for col in columns},
+                     engine='pyarrow')
+    return parse_dates(df)
+
+
+def read_source_chunks(csv_path, chunksize):
+    """Yield the CSV in parsed chunks of ``chunksize`` rows, for out-of-core processing."""
+    columns = source_columns(csv_path)
+    reader = pd.read_csv(csv_path, usecols=columns,
+                         dtype={col: DTYPES[col] for col in columns},
+                         chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            yield parse_dates(chunk)
+
+
+def _file_digest(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _manifest_path(csv_path, cache_dir):
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f'{stem}.manifest.json')
+
+
+def _parquet_path(csv_path, cache_dir, digest):
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f'{stem}-v{CACHE_VERSION}-{digest}.parquet')
+
+
+def _read_manifest(csv_path, cache_dir):
+    try:
+        with open(_manifest_path(csv_path, cache_dir)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(csv_path, cache_dir, fingerprint):
+    def write(path):
+        with open(path, 'w') as f:
+            json.dump(fingerprint, f)
+    write_atomic(_manifest_path(csv_path, cache_dir), write)
+
+
+def write_atomic(path, write):
+    """Call ``write(tmp_path)`` and move the result into place in one step."""
+    tmp_path = f'{path}.tmp-{os.getpid()}-{threading.get_ident()}'
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def source_fingerprint(csv_path=DATA_PATH, cache_dir=CACHE_DIR):
+    """Return the size, mtime and content hash identifying the CSV.
+
+    The file is only re-hashed when its size or mtime differs from the
+    stored manifest, so an unchanged CSV costs a single ``stat`` call. A
+    new hash is written to the manifest right away, so modes that never
+    build the Parquet cache (streaming, DuckDB, parallel) hash it once too.
+    """
+    stat = os.stat(csv_path)
+    manifest = _read_manifest(csv_path, cache_dir)
+    if (manifest and manifest.get('size') == stat.st_size
+            and manifest.get('mtime_ns') == stat.st_mtime_ns):
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                'digest': manifest['digest'], 'version': CACHE_VERSION}
+    # stat is taken before hashing: a write during the hash changes the mtime,
+    # so the file is hashed again on the next call
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                   'digest': _file_digest(csv_path), 'version': CACHE_VERSION}
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        _write_manifest(csv_path, cache_dir, fingerprint)
+    except OSError:
+        # A read-only cache directory only costs the hash on every call
+        pass
+    return fingerprint
+
+
+def dataset_version(csv_path=DATA_PATH, cache_dir=CACHE_DIR):
+    """Short identifier that changes whenever the CSV content changes."""
+    return f"v{CACHE_VERSION}-{source_fingerprint(csv_path, cache_dir)['digest']}"
+
+
+def load_jobs(csv_path=DATA_PATH, cache_dir=CACHE_DIR):
+    """Load the job postings, building the Parquet cache on first use."""
+    fingerprint = source_fingerprint(csv_path, cache_dir)
+    parquet_path = _parquet_path(csv_path, cache_dir, fingerprint['digest'])
+    manifest = _read_manifest(csv_path, cache_dir)
+
+    if os.path.exists(parquet_path):
+        if manifest != fingerprint:
+            # Same content with a new mtime (e.g. the file was touched)
+            _write_manifest(csv_path, cache_dir, fingerprint)
+        return pd.read_parquet(parquet_path)
+
+    df = read_source_csv(csv_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    write_atomic(parquet_path, lambda path: df.to_parquet(path, index=False))
+    _write_manifest(csv_path, cache_dir, fingerprint)
+    _remove_stale_caches(csv_path, cache_dir, keep=parquet_path)
+    return df
+
+
+def _remove_stale_caches(csv_path, cache_dir, keep):
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.startswith(f'{stem}-v') and name.endswith('.parquet') and path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,131 @@
+"""Multi-process ingest: parse, classify and aggregate CSV byte ranges in parallel.
+
+The CSV is split into byte ranges that start and end on row boundaries.
+Each range goes to a worker process, which parses it, applies the tech-job
+filter, derives sectors (``prepare_tech_jobs``) and reduces the rows to
+partial aggregates. Only those partials travel back, serialized as Arrow
+IPC buffers rather than pickled frames, and they are merged exactly like
+the streaming chunks. The postings themselves never cross a process
+boundary, so the work scales with the number of workers.
+
+Row boundaries respect quoted fields. A first parallel pass counts the
+quote characters in each range. The running count tells whether a range
+starts inside quotes, and the boundary is moved to the first newline that
+is outside them. A title or categories value that contains a newline is
+therefore never split between workers.
+
+The workers are forked, so the ingest is only started from single-threaded
+command-line processes (``python -m pipeline --workers N`` and the
+benchmarks). The dashboard never uses it: forking the multi-threaded
+Streamlit server can leave a child blocked on a lock that another thread
+held at the time of the fork.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_all_start_methods, get_context
+
+import numpy as np
+import pyarrow as pa
+
+from aggregates import merge_partials, partial_aggregates, prepare_tech_jobs, store_from_partials
+from classify import TECH_KEYWORDS
+from ingest import DATA_PATH, read_source_range
+
+# Default for ``python -m pipeline --workers``; 0 or 1 disables the parallel ingest
+INGEST_WORKERS = int(os.environ.get('SGJOBDATA_INGEST_WORKERS', '0'))
+
+# Byte ranges per worker, so a slow range does not hold up the whole pool
+RANGES_PER_WORKER = 4
+
+_BLOCK_SIZE = 1 << 20
+_QUOTE, _NEWLINE = ord('"'), ord('\n')
+
+
+def _count_quotes(csv_path, start, end):
+    count = 0
+    with open(csv_path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            count += block.count(b'"')
+            remaining -= len(block)
+    return count
+
+
+def _next_row_start(f, offset, in_quotes, end):
+    # First byte after a newline that is outside quotes, at or after offset
+    f.seek(offset)
+    while offset < end:
+        block = np.frombuffer(f.read(min(_BLOCK_SIZE, end - offset)), dtype=np.uint8)
+        if not len(block):
+            break
+        quoted = (np.cumsum(block == _QUOTE) + in_quotes) % 2 == 1
+        newlines = np.flatnonzero((block == _NEWLINE) & ~quoted)
+        if len(newlines):
+            return offset + int(newlines[0]) + 1
+        in_quotes = bool(quoted[-1])
+        offset += len(block)
+    return end
+
+
+def row_ranges(csv_path, n_ranges, executor=None):
+    """Split the data rows of the CSV into at most ``n_ranges`` byte ranges on row boundaries."""
+    size = os.path.getsize(csv_path)
+    with open(csv_path, 'rb') as f:
+        data_start = len(f.readline())
+    edges = np.linspace(data_start, size, max(n_ranges, 1) + 1).astype(np.int64)
+    starts, ends = edges[:-1].tolist(), edges[1:].tolist()
+    if executor is None:
+        quotes = [_count_quotes(csv_path, start, end) for start, end in zip(starts, ends)]
+    else:
+        quotes = list(executor.map(_count_quotes, [csv_path] * len(starts), starts, ends))
+    quotes_before = np.cumsum([0] + quotes[:-1])
+
+    boundaries = [data_start]
+    with open(csv_path, 'rb') as f:
+        for offset, before in zip(starts[1:], quotes_before[1:]):
+            boundaries.append(_next_row_start(f, offset, bool(before % 2), size))
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries[:-1], boundaries[1:]) if end > start]
+
+
+def _to_ipc(frame):
+    table = pa.Table.from_pandas(frame)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def _from_ipc(buffer):
+    return pa.ipc.open_stream(buffer).read_all().to_pandas()
+
+
+def _range_partials(csv_path, start, end, keywords):
+    # Runs in a worker: everything but the small partials stays in this process
+    tech_df = prepare_tech_jobs(read_source_range(csv_path, start, end), keywords)
+    return {name: _to_ipc(frame) for name, frame in partial_aggregates(tech_df).items()}
+
+
+def parallel_partials(csv_path=DATA_PATH, workers=INGEST_WORKERS, keywords=TECH_KEYWORDS):
+    """Partial aggregates of the CSV, computed by ``workers`` processes."""
+    workers = max(int(workers), 1)
+    # Forked workers inherit the loaded modules; callers are single-threaded (see above)
+    method = 'fork' if 'fork' in get_all_start_methods() else 'spawn'
+    with ProcessPoolExecutor(workers, mp_context=get_context(method)) as executor:
+        ranges = row_ranges(csv_path, workers * RANGES_PER_WORKER, executor)
+        if not ranges:
+            raise ValueError(f'{csv_path} contains no rows')
+        futures = [executor.submit(_range_partials, csv_path, start, end, list(keywords))
+                   for start, end in ranges]
+        partials = [{name: _from_ipc(buffer) for name, buffer in future.result().items()}
+                    for future in futures]
+    return merge_partials(partials)
+
+
+def parallel_aggregates(csv_path=DATA_PATH, workers=INGEST_WORKERS, keywords=TECH_KEYWORDS):
+    """Build the ``AggregateStore`` with the parallel ingest."""
+    return store_from_partials(parallel_partials(csv_path, workers, keywords))
@@ -0,0 +1,189 @@
+"""Dashboard data pipeline and its headless precompute entry point.
+
+``build_store`` turns the configured source into an ``AggregateStore``. The
+source is one CSV (in memory or streamed in chunks) or a directory of
+append-only partitions. ``write_artifact`` saves the store as a versioned
+directory of memory-mappable arrays. The dashboard can then map the latest
+artifact instead of building anything at startup:
+
+    python -m pipeline --out artifacts/
+    SGJOBDATA_ARTIFACT_DIR=artifacts/ streamlit run app.py
+
+The same command works from cron or CI. It does nothing if an artifact for
+the current data version and keyword list already exists.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+
+from aggregates import AggregateStore, build_aggregates
+from classify import keywords_digest, load_tech_keywords
+from diagnostics import stage
+from duckdb_engine import ENGINE, ENGINES, duckdb_aggregates
+from incremental import PARTITIONS_DIR, STATE_DIR, IncrementalState, partitions_version
+from ingest import DATA_PATH, dataset_version, load_jobs, write_atomic
+from parallel import INGEST_WORKERS, parallel_aggregates
+from streaming import STREAM_CHUNKSIZE, stream_aggregates
+
+ARTIFACT_DIR = os.environ.get('SGJOBDATA_ARTIFACT_DIR')
+
+# Bump when the on-disk layout of AggregateStore.save changes
+ARTIFACT_FORMAT = 2
+
+# One incremental state per keyword list, shared by every caller in the process
+_incremental_states = {}
+_incremental_lock = threading.Lock()
+
+
+def source_version(keywords, csv_path=DATA_PATH, partitions_dir=PARTITIONS_DIR):
+    """Identifier of the source data, keyword list and artifact format."""
+    if partitions_dir:
+        data = partitions_version(partitions_dir)
+    else:
+        data = dataset_version(csv_path)
+    return f'{data}-k{keywords_digest(keywords)}-a{ARTIFACT_FORMAT}'
+
+
+def incremental_state(keywords, state_dir=STATE_DIR):
+    """The process-wide ``IncrementalState`` for a keyword list."""
+    key = (state_dir, tuple(keywords))
+    with _incremental_lock:
+        if key not in _incremental_states:
+            _incremental_states[key] = IncrementalState(state_dir, keywords)
+        return _incremental_states[key]
+
+
+def build_store(keywords, csv_path=DATA_PATH, partitions_dir=PARTITIONS_DIR,
+                stream_chunksize=STREAM_CHUNKSIZE, engine=ENGINE, workers=0):
+    """Build the ``AggregateStore`` from the configured source.
+
+    ``workers`` > 1 forks worker processes, so it is only passed by the
+    single-threaded command line, never from inside the dashboard.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f'unknown engine {engine!r}; expected one of {ENGINES}')
+    if partitions_dir:
+        # Merge only the partitions that arrived since the last refresh
+        with stage('build.incremental'):
+            state = incremental_state(keywords)
+            state.refresh(partitions_dir)
+            return state.store()
+    if engine == 'duckdb':
+        # DuckDB scans the CSV itself, out of core and on every core
+        with stage('build.duckdb'):
+            return duckdb_aggregates(csv_path, keywords)
+    if workers > 1:
+        # Byte ranges of the CSV are parsed and aggregated in worker processes
+        with stage('build.parallel'):
+            return parallel_aggregates(csv_path, workers, keywords)
+    if stream_chunksize:
+        # Out-of-core mode for CSVs larger than memory
+        with stage('build.streaming'):
+            return stream_aggregates(csv_path, stream_chunksize, keywords)
+    with stage('load_jobs') as record:
+        df = load_jobs(csv_path)
+        record.rows = len(df)
+    return build_aggregates(df, keywords)
+
+
+def latest_artifact(artifact_dir=ARTIFACT_DIR):
+    """Version of the most recently written artifact, or None if there is none."""
+    try:
+        with open(os.path.join(artifact_dir, 'LATEST')) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def read_artifact(version, artifact_dir=ARTIFACT_DIR):
+    """Memory-map the store saved under ``version``."""
+    return AggregateStore.load(os.path.join(artifact_dir, version))
+
+
+def current_version(keywords, artifact_dir=ARTIFACT_DIR):
+    """Version the dashboard should serve: the latest artifact, else the source data version."""
+    return (latest_artifact(artifact_dir) if artifact_dir else None) or source_version(keywords)
+
+
+def load_store(version, keywords, artifact_dir=ARTIFACT_DIR):
+    """The store for ``version``: memory-mapped if an artifact of it exists, else built from the source."""
+    if artifact_dir and os.path.isdir(os.path.join(artifact_dir, version)):
+        return read_artifact(version, artifact_dir)
+    return build_store(keywords)
+
+
+def write_artifact(store, version, artifact_dir=ARTIFACT_DIR, metadata=None):
+    """Save ``store`` under ``version`` and point LATEST at it.
+
+    The store is written to a temporary directory that is renamed into place,
+    so readers never see a partial artifact.
+    """
+    final_dir = os.path.join(artifact_dir, version)
+    if not os.path.isdir(final_dir):
+        tmp_dir = os.path.join(artifact_dir, f'.tmp-{version}-{os.getpid()}')
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        store.save(tmp_dir)
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump(dict(metadata or {}, version=version, format=ARTIFACT_FORMAT,
+                           created=time.strftime('%Y-%m-%dT%H:%M:%S%z')), f, indent=1)
+        os.replace(tmp_dir, final_dir)
+    set_latest(version, artifact_dir)
+    return final_dir
+
+
+def set_latest(version, artifact_dir=ARTIFACT_DIR):
+    """Atomically point LATEST at an existing artifact."""
+    def write(path):
+        with open(path, 'w') as f:
+            f.write(version)
+    write_atomic(os.path.join(artifact_dir, 'LATEST'), write)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Precompute the dashboard aggregates and write them as a versioned artifact.')
+    parser.add_argument('--csv', default=DATA_PATH, help='source CSV (default: %(default)s)')
+    parser.add_argument('--partitions', default=PARTITIONS_DIR,
+                        help='directory of append-only CSV partitions (overrides --csv)')
+    parser.add_argument('--stream-chunksize', type=int, default=STREAM_CHUNKSIZE,
+                        help='read the CSV in chunks of this many rows (0 = in memory)')
+    parser.add_argument('--engine', choices=ENGINES, default=ENGINE,
+                        help='aggregation engine for a CSV source (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=INGEST_WORKERS,
+                        help='parse the CSV in this many processes (0 or 1 = single process)')
+    parser.add_argument('--out', default=ARTIFACT_DIR or 'artifacts',
+                        help='artifact directory (default: %(default)s)')
+    parser.add_argument('--force', action='store_true',
+                        help='rebuild even if an artifact for this version exists')
+    args = parser.parse_args(argv)
+
+    keywords = load_tech_keywords()
+    version = source_version(keywords, args.csv, args.partitions)
+    final_dir = os.path.join(args.out, version)
+    if os.path.isdir(final_dir) and not args.force:
+        set_latest(version, args.out)
+        print(f'{final_dir} is up to date')
+        return 0
+    if args.force:
+        shutil.rmtree(final_dir, ignore_errors=True)
+
+    start = time.perf_counter()
+    store = build_store(keywords, args.csv, args.partitions, args.stream_chunksize,
+                        args.engine, args.workers)
+    os.makedirs(args.out, exist_ok=True)
+    write_artifact(store, version, args.out, metadata={
+        'source': args.partitions or args.csv,
+        'engine': args.engine,
+        'workers': args.workers,
+        'build_seconds': round(time.perf_counter() - start, 3),
+    })
+    print(f'wrote {final_dir} in {time.perf_counter() - start:.1f}s')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Reload the dashboard data in the background and swap it in atomically.
+
+A ``Reloader`` holds the ``DataHandle`` every rerun starts from: an
+immutable (version, store) pair. A daemon thread polls the data source
+every ``RELOAD_INTERVAL`` seconds. A poll costs a few ``stat`` calls; the
+data version, which may hash the CSV, is only computed after the stat
+signature changed and then stayed the same for ``SETTLE_SECONDS``, so a
+file that is still being written is not read. A new version is built on
+the watcher thread while every session keeps serving the previous handle.
+When the build is complete the handle is replaced in a single assignment,
+so a reader gets either the old version or the new one, never a mix.
+
+The app takes the handle once at the start of each rerun. A session
+therefore keeps the version it has until its next rerun; the old store is
+freed once no session holds it. If a build fails, the previous version
+stays in place and ``last_error`` is set. The build is retried the next
+time the source changes.
+
+Settings:
+
+- ``SGJOBDATA_RELOAD_INTERVAL``: seconds between polls (default 30). With 0
+  there is no watcher thread, and every rerun checks the version and
+  rebuilds in the foreground, as before.
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from diagnostics import Recorder
+from incremental import PARTITIONS_DIR, list_partitions
+from ingest import DATA_PATH
+from pipeline import ARTIFACT_DIR
+
+RELOAD_INTERVAL = float(os.environ.get('SGJOBDATA_RELOAD_INTERVAL', '30'))
+
+# A changed source must keep the same signature this long before it is read
+SETTLE_SECONDS = 2.0
+
+
+@dataclass(frozen=True)
+class DataHandle:
+    """One loaded dataset version."""
+    version: str
+    store: object
+    loaded_at: float
+    build_seconds: float
+
+
+def source_signature(csv_path=DATA_PATH, partitions_dir=PARTITIONS_DIR, artifact_dir=ARTIFACT_DIR):
+    """Size and mtime of every file the data version depends on."""
+    paths = [os.path.join(artifact_dir, 'LATEST')] if artifact_dir else []
+    paths += list_partitions(partitions_dir) if partitions_dir else [csv_path]
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            signature.append((path, None, None))
+        else:
+            signature.append((path, stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+class Reloader:
+    """Serve the current ``DataHandle`` and replace it when the source changes.
+
+    ``version()`` returns the version of the data source, and ``load(version)``
+    builds the store for it.
+    """
+
+    def __init__(self, version, load, signature=source_signature, interval=RELOAD_INTERVAL):
+        self._version = version
+        self._load = load
+        self._signature = signature
+        self.interval = interval
+        self._handle = None
+        self._build_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None
+        self.failed_version = None
+
+    @property
+    def ready(self):
+        return self._handle is not None
+
+    def start(self):
+        """Start the watcher thread (unless ``interval`` is 0)."""
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._watch, args=(self._signature(),),
+                                            name='data-reloader', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def current(self):
+        """The handle to serve. Blocks only until the first version is loaded."""
+        if self._handle is None or self._thread is None:
+            self.refresh()
+        return self._handle
+
+    def refresh(self):
+        """Build and swap in the source's current version if it is new; True if it was swapped."""
+        version = self._version()
+        handle = self._handle
+        if handle is not None and version in (handle.version, self.failed_version):
+            return False
+        with self._build_lock:
+            if self._handle is not None and self._handle.version == version:
+                return False
+            try:
+                new_handle = self._build(version)
+            except Exception as exc:
+                if self._handle is None:
+                    # Nothing to fall back to
+                    raise
+                self.last_error, self.failed_version = exc, version
+                return False
+            self._handle = new_handle
+            self.last_error = self.failed_version = None
+            return True
+
+    def _build(self, version):
+        start = time.perf_counter()
+        store = self._load(version)
+        return DataHandle(version, store, time.time(), time.perf_counter() - start)
+
+    def _watch(self, signature):
+        while not self._stop.wait(self.interval):
+            try:
+                new_signature = self._signature()
+                if new_signature == signature:
+                    continue
+                # Let a writer finish before reading the source
+                if self._stop.wait(SETTLE_SECONDS) or self._signature() != new_signature:
+                    continue
+                signature = new_signature
+                # Background builds are not part of any rerun; log their stages on their own
+                recorder = Recorder().start()
+                swapped = False
+                try:
+                    swapped = self.refresh()
+                finally:
+                    recorder.finish(context={'reload': self._handle.version if self._handle else None,
+                                             'swapped': swapped})
+            except Exception as exc:
+                # Keep watching; the next change retries
+                self.last_error = exc
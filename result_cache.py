@@ -0,0 +1,200 @@
+"""Process-wide cache of dashboard query results, shared by every session.
+
+Each dashboard section asks the cache for its results under a key made of
+the data version, the section name and the filter values it depends on.
+Sessions that choose the same filters share one computed result.
+
+Results are returned as they are, without a copy, and callers must treat
+them as read-only. With pandas copy-on-write, frames derived from a result
+(column selections, ``head``, ``sort_values``, ...) may share its memory
+but copy it before they are changed, so deriving from a cached frame is
+safe. Memory per session therefore does not grow with the number of users;
+only distinct filter combinations cost memory.
+
+The in-memory tier holds at most ``max_bytes``. Past that, least-recently
+used entries are evicted. With a ``spill_dir`` they are pickled to disk
+rather than dropped, and loaded back (and moved back into memory) on the
+next hit. Each cache spills into its own subdirectory of ``spill_dir``
+(``<pid>-<random>``), so several processes can share one directory. The
+disk tier is evicted in the same LRU order at ``spill_max_bytes``. Files
+are written and read outside the lock, so a slow disk does not block
+lookups. Two sessions that miss the same key at the same time both compute
+it; the second result replaces the first.
+
+Settings:
+
+- ``SGJOBDATA_RESULT_CACHE_MB``: in-memory limit (default 256, 0 disables the cache)
+- ``SGJOBDATA_RESULT_CACHE_DIR``: directory for the disk tier (default: none)
+- ``SGJOBDATA_RESULT_CACHE_DISK_MB``: disk tier limit (default 1024)
+"""
+import atexit
+import os
+import pickle
+import shutil
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+MAX_BYTES = int(float(os.environ.get('SGJOBDATA_RESULT_CACHE_MB', '256')) * 2**20)
+SPILL_DIR = os.environ.get('SGJOBDATA_RESULT_CACHE_DIR')
+SPILL_MAX_BYTES = int(float(os.environ.get('SGJOBDATA_RESULT_CACHE_DISK_MB', '1024')) * 2**20)
+
+
+def result_nbytes(value):
+    """Approximate memory held by a cached result."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(result_nbytes(k) + result_nbytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(result_nbytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """LRU cache with a byte limit, an optional disk tier and hit/miss counters."""
+
+    def __init__(self, max_bytes=MAX_BYTES, spill_dir=SPILL_DIR, spill_max_bytes=SPILL_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.spill_dir = None
+        self.spill_max_bytes = spill_max_bytes
+        self._entries = OrderedDict()  # key -> (value, nbytes), least recently used first
+        self._spilled = OrderedDict()  # key -> (path, nbytes)
+        self._bytes = 0
+        self._spilled_bytes = 0
+        self._lock = threading.Lock()
+        self.counters = dict.fromkeys(('hits', 'disk_hits', 'misses', 'evictions', 'spills'), 0)
+        if spill_dir:
+            # Spilled files are only valid for the cache that wrote them
+            self.spill_dir = os.path.join(spill_dir, f'{os.getpid()}-{uuid.uuid4().hex[:12]}')
+            os.makedirs(self.spill_dir)
+            atexit.register(self.close)
+
+    def get(self, key, compute):
+        """The cached result for ``key``, calling ``compute()`` on a miss."""
+        if self.max_bytes <= 0:
+            return compute()
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.counters['hits'] += 1
+                return self._entries[key][0]
+            spilled = self._spilled.pop(key, None)
+            if spilled is not None:
+                self._spilled_bytes -= spilled[1]
+        if spilled is not None:
+            value = self._load(spilled[0])
+            if value is not None:
+                self._store(key, value, spilled[1], 'disk_hits')
+                return value
+        value = compute()
+        self._store(key, value, result_nbytes(value), 'misses')
+        return value
+
+    def _store(self, key, value, nbytes, counter):
+        with self._lock:
+            self.counters[counter] += 1
+            evicted, stale = self._insert(key, value, nbytes)
+        for path in stale:
+            self._remove(path)
+        if self.spill_dir:
+            for old_key, old_value, old_nbytes in evicted:
+                self._spill(old_key, old_value, old_nbytes)
+
+    def _insert(self, key, value, nbytes):
+        # Called with the lock held; returns the evicted entries and the files to remove
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        # Another session may have spilled this key while it was being computed
+        stale = []
+        spilled = self._spilled.pop(key, None)
+        if spilled is not None:
+            self._spilled_bytes -= spilled[1]
+            stale.append(spilled[0])
+        self._entries[key] = (value, nbytes)
+        self._bytes += nbytes
+        evicted = []
+        while self._bytes > self.max_bytes and self._entries:
+            old_key, (old_value, old_nbytes) = self._entries.popitem(last=False)
+            self._bytes -= old_nbytes
+            self.counters['evictions'] += 1
+            evicted.append((old_key, old_value, old_nbytes))
+        return evicted, stale
+
+    def _spill(self, key, value, nbytes):
+        # The file name is unique, so nothing else reads or writes it until it is registered
+        path = os.path.join(self.spill_dir, f'{uuid.uuid4().hex}.pkl')
+        try:
+            with open(path, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except (OSError, pickle.PicklingError):
+            self._remove(path)
+            return
+        stale = []
+        with self._lock:
+            if key in self._entries or key in self._spilled:
+                # Computed again (or spilled by another session) while the file was written
+                stale.append(path)
+            else:
+                self._spilled[key] = (path, nbytes)
+                self._spilled_bytes += nbytes
+                self.counters['spills'] += 1
+                while self._spilled_bytes > self.spill_max_bytes and self._spilled:
+                    _, (old_path, old_nbytes) = self._spilled.popitem(last=False)
+                    self._spilled_bytes -= old_nbytes
+                    stale.append(old_path)
+        for old_path in stale:
+            self._remove(old_path)
+
+    def _load(self, path):
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        finally:
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        with self._lock:
+            paths = [path for path, _ in self._spilled.values()]
+            self._entries.clear()
+            self._spilled.clear()
+            self._bytes = self._spilled_bytes = 0
+        for path in paths:
+            self._remove(path)
+
+    def close(self):
+        """Clear the cache and remove its spill directory."""
+        self.clear()
+        if self.spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def stats(self):
+        """Counters plus the current size of each tier."""
+        with self._lock:
+            lookups = self.counters['hits'] + self.counters['disk_hits'] + self.counters['misses']
+            return {
+                **self.counters,
+                'hit_rate': (self.counters['hits'] + self.counters['disk_hits']) / lookups if lookups else None,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'spilled_entries': len(self._spilled),
+                'spilled_bytes': self._spilled_bytes,
+            }
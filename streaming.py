@@ -0,0 +1,34 @@
+"""Out-of-core streaming aggregation for CSVs larger than memory.
+
+The CSV is read in fixed-size chunks. Each chunk is classified, gets its
+sectors, and is reduced to partial aggregates (per-day counts, sums and
+sketch buckets), which are folded into a running total before the next
+chunk is read. No full frame is ever materialized, so peak memory depends
+on the chunk size and the number of distinct (day, key) pairs, not on the
+number of rows in the file.
+"""
+import os
+
+from aggregates import merge_partials, partial_aggregates, prepare_tech_jobs, store_from_partials
+from classify import TECH_KEYWORDS
+from ingest import DATA_PATH, read_source_chunks
+
+# Rows per chunk in streaming mode; 0 loads the whole (cached) file in memory instead
+STREAM_CHUNKSIZE = int(os.environ.get('SGJOBDATA_STREAM_CHUNKSIZE', '0'))
+
+
+def stream_partials(csv_path=DATA_PATH, chunksize=250_000, keywords=TECH_KEYWORDS):
+    """Fold every chunk of the CSV into one set of merged partial aggregates."""
+    running = None
+    for chunk in read_source_chunks(csv_path, chunksize):
+        tech_df = prepare_tech_jobs(chunk, keywords)
+        del chunk
+        running = merge_partials([running, partial_aggregates(tech_df)])
+    if running is None:
+        raise ValueError(f'{csv_path} contains no rows')
+    return running
+
+
+def stream_aggregates(csv_path=DATA_PATH, chunksize=250_000, keywords=TECH_KEYWORDS):
+    """Build the ``AggregateStore`` from the CSV without loading it whole."""
+    return store_from_partials(stream_partials(csv_path, chunksize, keywords))
@@ -0,0 +1,48 @@
+"""Parsing of the categories column and the exploded (job_id, category) table."""
+import numpy as np
+import pandas as pd
+
+from aggregates import category_table, partial_aggregates, prepare_tech_jobs, store_from_partials
+from categories import explode_categories, primary_categories
+from ingest import DTYPES, parse_dates
+
+IT = '[{"id":21,"category":"Information Technology"}]'
+IT_ENG = '[{"id":21,"category":"Information Technology"},{"id":13,"category":"Engineering"}]'
+BAD_FIRST = '[{"id":1},{"id":13,"category":"Engineering"}]'
+LITERAL = "[{'id': 13, 'category': 'Engineering'}]"
+
+
+def test_primary_categories():
+    sectors = primary_categories([IT, IT_ENG, BAD_FIRST, LITERAL, None, '[]', 'not a list'])
+    assert list(sectors) == ['Information Technology', 'Information Technology', 'Unknown', 'Engineering',
+                             'Unknown', 'Unknown', 'Unknown']
+    assert list(sectors.categories) == ['Engineering', 'Information Technology', 'Unknown']
+
+
+def test_explode_categories_keys():
+    table = explode_categories(pd.Series([IT_ENG, None, BAD_FIRST, IT], dtype='category'), ['a', 'b', None, 'a'])
+    assert table['row'].tolist() == [0, 0, 2, 3]
+    assert table['row'].dtype == np.int32
+    assert table['job_id'].tolist()[:2] == ['a', 'a'] and pd.isna(table['job_id'][2])
+    assert table['job_id'].cat.codes.tolist() == [0, 0, -1, 0]
+    assert table['category'].tolist() == ['Information Technology', 'Engineering', 'Engineering',
+                                          'Information Technology']
+    assert table['position'].tolist() == [0, 1, 1, 0]
+    assert 'job_id' not in explode_categories([IT])
+
+
+def test_category_postings_count_every_listed_category():
+    df = parse_dates(pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in DTYPES.items()}).reindex(range(4)))
+    df['title'] = 'Software Engineer'
+    df['metadata_jobPostId'] = ['j1', 'j2', 'j3', 'j4']
+    df['metadata_newPostingDate'] = pd.to_datetime(['2023-05-01', '2023-05-01', '2023-05-02', '2023-05-02'])
+    df['categories'] = [IT_ENG, IT, BAD_FIRST, '[]']
+    tech_df = prepare_tech_jobs(df)
+    assert len(category_table(tech_df)) == 4
+    store = store_from_partials(partial_aggregates(tech_df))
+    every = store.category_postings('2023-05-01', '2023-05-02').set_index('Sector')['Total Postings']
+    first = store.sector_postings('2023-05-01', '2023-05-02').set_index('Sector')['Total Postings']
+    assert every.to_dict() == {'Engineering': 2, 'Information Technology': 2, 'Unknown': 1}
+    assert first.to_dict() == {'Information Technology': 2, 'Unknown': 2}
+    assert store.category_postings('2023-05-02', '2023-05-02').set_index('Sector')['Total Postings'].to_dict() == {
+        'Engineering': 1, 'Unknown': 1}
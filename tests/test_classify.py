@@ -0,0 +1,57 @@
+"""Which titles the default keywords classify as tech."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from classify import classify_titles, keywords_digest, tech_title_mask
+
+TECH_TITLES = [
+    'Cybersecurity Specialist',     # "cyber" as the start of a word
+    'Technology Manager',           # "tech"
+    'Technical Lead',
+    'Senior Software Engineers',    # plural
+    'Data Engineering Lead',        # -ing form of "engineer"
+    'Solutions Architecture Lead',  # "architect"
+    'Networking Specialist',
+    'IT Support Executive',         # short keywords as whole words
+    'AI Researcher',
+    'SQL Developer',
+    'JavaScript Developer',
+    'Machine   Learning Engineer',  # any whitespace inside a keyword
+]
+
+NON_TECH_TITLES = [
+    'Digital Marketing Executive',  # "it" inside a word
+    'Retail Assistant',             # "ai" inside a word
+    'Quantity Surveyor',
+    'Waiter / Waitress',
+    'Admin Assistant',
+    'Biotech Lab Assistant',        # "tech" not at the start of a word
+]
+
+
+@pytest.mark.parametrize('title', TECH_TITLES)
+def test_tech_titles(title):
+    assert classify_titles([title]).tolist() == [True]
+
+
+@pytest.mark.parametrize('title', NON_TECH_TITLES)
+def test_non_tech_titles(title):
+    assert classify_titles([title]).tolist() == [False]
+
+
+def test_mask_broadcasts_to_rows_and_skips_missing_titles():
+    titles = pd.Series(['IT Support Executive', None, 'Retail Assistant', 'IT Support Executive'], index=[5, 6, 7, 8])
+    mask = tech_title_mask(titles)
+    assert mask.index.tolist() == [5, 6, 7, 8]
+    assert mask.tolist() == [True, False, False, True]
+    assert tech_title_mask(np.array(['AI Researcher'], dtype=object)).tolist() == [True]
+
+
+def test_custom_keywords():
+    assert classify_titles(['Nurse', 'Registered Nurses', 'Nursery Teacher'], ['nurse']).tolist() == [True, True, True]
+    assert classify_titles(['Nurse'], []).tolist() == [False]
+
+
+def test_digest_depends_on_keywords():
+    assert keywords_digest(['it', 'ai']) != keywords_digest(['it'])
@@ -0,0 +1,41 @@
+"""Profiling on request is gated by the server and keeps a bounded number of files."""
+import os
+
+import diagnostics
+from diagnostics import Recorder, profiling_allowed, prune_profiles
+
+
+def test_profiling_needs_diagnostics_or_token(monkeypatch):
+    monkeypatch.setattr(diagnostics, 'DIAGNOSTICS', False)
+    monkeypatch.setattr(diagnostics, 'PROFILE_TOKEN', '')
+    assert not profiling_allowed(None)
+    assert not profiling_allowed('')
+    monkeypatch.setattr(diagnostics, 'PROFILE_TOKEN', 's3cret')
+    assert not profiling_allowed(None)
+    assert not profiling_allowed('guess')
+    assert not profiling_allowed('s3crét')
+    assert profiling_allowed('s3cret')
+    monkeypatch.setattr(diagnostics, 'DIAGNOSTICS', True)
+    assert profiling_allowed(None)
+
+
+def test_prune_keeps_newest_profiles(tmp_path):
+    for number in range(5):
+        path = tmp_path / f'rerun-{number}.prof'
+        path.write_text('')
+        os.utime(path, ns=(number * 10**9, number * 10**9))
+    (tmp_path / 'notes.txt').write_text('')
+    prune_profiles(str(tmp_path), keep=2)
+    assert sorted(os.listdir(tmp_path)) == ['notes.txt', 'rerun-3.prof', 'rerun-4.prof']
+    prune_profiles(str(tmp_path / 'missing'), keep=2)
+
+
+def test_saved_profiles_are_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(diagnostics, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setattr(diagnostics, 'PROFILE_KEEP', 1)
+    (tmp_path / 'rerun-old.prof').write_text('')
+    os.utime(tmp_path / 'rerun-old.prof', ns=(0, 0))
+    recorder = Recorder(profile='cprofile').start()
+    recorder.finish(log_path=None)
+    assert recorder.profile_path is not None
+    assert os.listdir(tmp_path) == [os.path.basename(recorder.profile_path)]
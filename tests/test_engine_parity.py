@@ -0,0 +1,64 @@
+"""The DuckDB engine must return the same aggregates as the pandas engine.
+
+Runs on a small synthetic CSV from ``benchmarks.generate_data``. It has
+postings in every sector, including ones that sort after 'Unknown'.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('duckdb')
+
+from aggregates import partial_aggregates, prepare_tech_jobs, store_from_partials
+from benchmarks.check_engine_parity import compare_frames, dashboard_frames
+from benchmarks.generate_data import generate
+from duckdb_engine import duckdb_partials
+from ingest import load_jobs
+
+
+@pytest.fixture(scope='module')
+def partials(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('parity')
+    csv_path = str(directory / 'jobs.csv')
+    generate(csv_path, 10_000, seed=0)
+    expected = partial_aggregates(prepare_tech_jobs(load_jobs(csv_path, str(directory / 'cache'))))
+    return expected, duckdb_partials(csv_path)
+
+
+def test_partial_aggregates_match(partials):
+    expected, actual = partials
+    assert set(actual) == set(expected)
+    problems = [problem for name in expected for problem in compare_frames(name, expected[name], actual[name])]
+    assert problems == []
+
+
+def test_dashboard_frames_match(partials):
+    expected_store, actual_store = (store_from_partials(p) for p in partials)
+    days = expected_store.daily_totals.index
+    rng = np.random.default_rng(0)
+    windows = [(expected_store.min_date, expected_store.max_date)]
+    for _ in range(5):
+        i, j = sorted(rng.integers(0, len(days), size=2))
+        windows.append((days[i].date(), days[j].date()))
+    problems = []
+    for window in windows:
+        left, right = dashboard_frames(expected_store, *window), dashboard_frames(actual_store, *window)
+        problems += [f'{window}: {problem}' for name in left
+                     for problem in compare_frames(name, left[name], right[name])]
+    assert problems == []
+
+
+def test_compare_frames_ignores_key_order_and_dtype():
+    sectors = ['Information Technology', 'Wholesale Trade', 'Unknown']
+    expected = pd.DataFrame({'Sector': pd.Categorical(sectors, categories=sectors), 'rows': [3, 2, 1]})
+    actual = pd.DataFrame({'Sector': sorted(sectors), 'rows': [3, 1, 2]})
+    assert compare_frames('sector', expected.set_index('Sector'), actual.set_index('Sector')) == []
+
+
+def test_compare_frames_reports_mismatches(partials):
+    expected, _ = partials
+    frame = expected['sector']
+    changed = frame.copy()
+    changed.iloc[0, 0] += 1
+    assert compare_frames('sector', frame, changed) == ['sector.rows: values differ']
+    assert compare_frames('sector', frame, frame.iloc[1:]) != []
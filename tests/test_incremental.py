@@ -0,0 +1,150 @@
+"""Incremental refreshes must give the same store as one deduplicated build.
+
+A synthetic CSV from ``benchmarks.generate_data`` is split into partitions
+on day boundaries. The partitions repeat ``metadata_jobPostId``s within a
+file and across files, and the last one holds rows dated before the others.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import incremental
+from aggregates import MATRIX_PARTIALS, partial_aggregates, prepare_tech_jobs, store_from_partials
+from benchmarks.check_engine_parity import compare_frames, dashboard_frames
+from benchmarks.generate_data import generate
+from incremental import IncrementalState, SeenIds
+from ingest import read_source_csv
+
+
+@pytest.fixture(scope='module')
+def partitions(tmp_path_factory):
+    """Partition frames in processing order, keyed by file name."""
+    csv_path = str(tmp_path_factory.mktemp('source') / 'jobs.csv')
+    generate(csv_path, 10_000, seed=1)
+    raw = pd.read_csv(csv_path, dtype=str).sort_values('metadata_newPostingDate', kind='stable')
+    late = raw.iloc[::10]
+    raw = raw.drop(late.index)
+    days = raw['metadata_newPostingDate'].unique()
+    chunks = [raw[raw['metadata_newPostingDate'].isin(part)] for part in np.array_split(days, 4)]
+    # Repeats within a partition, and reposts of earlier postings in a later one
+    chunks[1] = pd.concat([chunks[1], chunks[1].sample(200, random_state=0)])
+    chunks[3] = pd.concat([chunks[3], chunks[0].sample(300, random_state=1)])
+    return {f'{number:02d}.csv': chunk for number, chunk in enumerate(chunks + [late], start=1)}
+
+
+def write_partitions(directory, frames):
+    os.makedirs(directory, exist_ok=True)
+    for name, frame in frames.items():
+        frame.to_csv(os.path.join(directory, name), index=False)
+
+
+def expected_store(frames, directory):
+    """One build over every partition, keeping the first row of each posting id."""
+    path = os.path.join(directory, 'all.csv')
+    pd.concat(frames.values()).to_csv(path, index=False)
+    tech_df = prepare_tech_jobs(read_source_csv(path))
+    ids = tech_df['metadata_jobPostId']
+    return store_from_partials(partial_aggregates(tech_df[~(ids.duplicated() & ids.notna())]))
+
+
+def assert_same_store(expected, actual):
+    pd.testing.assert_frame_equal(actual.daily_totals, expected.daily_totals, check_freq=False)
+    days = expected.daily_totals.index
+    windows = [(expected.min_date, expected.max_date), (days[5].date(), days[40].date()),
+               (days[len(days) // 2].date(), days[-3].date())]
+    problems = []
+    for window in windows:
+        left, right = dashboard_frames(expected, *window), dashboard_frames(actual, *window)
+        problems += [f'{window}: {problem}' for name in left
+                     for problem in compare_frames(name, left[name], right[name])]
+    assert problems == []
+
+
+def test_refreshes_match_deduplicated_build(partitions, tmp_path):
+    parts_dir, state_dir = str(tmp_path / 'parts'), str(tmp_path / 'state')
+    state = IncrementalState(state_dir)
+    for name, frame in partitions.items():
+        # One partition at a time, so the cached store is extended between refreshes
+        write_partitions(parts_dir, {name: frame})
+        assert state.refresh(parts_dir) == 1
+        state.store()
+    expected = expected_store(partitions, str(tmp_path))
+    assert_same_store(expected, state.store())
+    assert_same_store(expected, IncrementalState(state_dir).store())
+
+
+def test_extended_store_equals_rebuild(partitions, tmp_path):
+    parts_dir = str(tmp_path / 'parts')
+    state = IncrementalState(str(tmp_path / 'state'))
+    in_order = dict(list(partitions.items())[:4])
+    for name, frame in in_order.items():
+        write_partitions(parts_dir, {name: frame})
+        state.refresh(parts_dir)
+        state.store()
+    extended, rebuilt = state.store(), store_from_partials(state.partials())
+    pd.testing.assert_frame_equal(extended.daily_totals, rebuilt.daily_totals, check_freq=False)
+    for attr in MATRIX_PARTIALS:
+        left, right = getattr(extended, attr), getattr(rebuilt, attr)
+        assert left.keys.equals(right.keys), attr
+        np.testing.assert_array_equal(left.indptr, right.indptr)
+        np.testing.assert_array_equal(left.key_codes, right.key_codes)
+        assert left.values.keys() == right.values.keys()
+        for column in left.values:
+            np.testing.assert_array_equal(left.values[column], right.values[column])
+
+
+def test_failed_merge_keeps_last_committed_state(partitions, tmp_path, monkeypatch):
+    parts_dir, state_dir = str(tmp_path / 'parts'), str(tmp_path / 'state')
+    write_partitions(parts_dir, partitions)
+    write_atomic = incremental.write_atomic
+    commits = []
+
+    def failing_write(path, write):
+        if os.path.basename(path) == 'manifest.json':
+            commits.append(path)
+            if len(commits) == 3:
+                raise OSError('disk full')
+        write_atomic(path, write)
+
+    monkeypatch.setattr(incremental, 'write_atomic', failing_write)
+    state = IncrementalState(state_dir)
+    with pytest.raises(OSError):
+        state.refresh(parts_dir)
+    assert list(state.partitions) == list(partitions)[:2]
+    assert list(IncrementalState(state_dir).partitions) == list(partitions)[:2]
+
+    assert state.refresh(parts_dir) == len(partitions) - 2
+    expected = expected_store(partitions, str(tmp_path))
+    assert_same_store(expected, state.store())
+    assert_same_store(expected, IncrementalState(state_dir).store())
+
+
+def test_modified_partition_rebuilds_state(partitions, tmp_path):
+    parts_dir = str(tmp_path / 'parts')
+    write_partitions(parts_dir, partitions)
+    state = IncrementalState(str(tmp_path / 'state'))
+    state.refresh(parts_dir)
+    state.store()
+
+    modified = dict(partitions)
+    modified['02.csv'] = partitions['02.csv'].iloc[::2]
+    write_partitions(parts_dir, {'02.csv': modified['02.csv']})
+    assert state.refresh(parts_dir) == len(partitions)
+    assert_same_store(expected_store(modified, str(tmp_path)), state.store())
+
+
+def test_seen_ids_membership():
+    seen = SeenIds([5, 1, 3])
+    rng = np.random.default_rng(0)
+    added = set()
+    for _ in range(20):
+        ids = np.unique(rng.integers(0, 1_000, size=30).astype(np.uint64))
+        seen.add(ids[~seen.contains(ids)])
+        added.update(ids.tolist())
+    probe = np.arange(1_100, dtype=np.uint64)
+    expected = np.isin(probe, np.array(sorted(added | {1, 3, 5}), dtype=np.uint64))
+    np.testing.assert_array_equal(seen.contains(probe), expected)
+    assert len(seen) == expected.sum()
+    assert not SeenIds().contains(np.array([0], dtype=np.uint64)).any()
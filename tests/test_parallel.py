@@ -0,0 +1,89 @@
+"""Byte ranges from ``row_ranges`` must cover every row exactly once.
+
+The CSV is a generated one whose titles contain embedded newlines and
+``""`` escapes, so many range edges first land inside a quoted field.
+"""
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import build_aggregates
+from benchmarks.check_engine_parity import compare_frames, dashboard_frames
+from benchmarks.generate_data import generate
+from ingest import read_source_csv, read_source_range
+from parallel import parallel_aggregates, row_ranges
+
+RANGE_COUNTS = [1, 2, 3, 7, 16, 50, 200]
+
+
+@pytest.fixture(scope='module')
+def quoted_csv(tmp_path_factory):
+    """Path of the CSV and the byte offset at which each data row starts."""
+    directory = tmp_path_factory.mktemp('parallel')
+    generate(str(directory / 'plain.csv'), 3_000, seed=2)
+    raw = pd.read_csv(directory / 'plain.csv', dtype=str, keep_default_na=False)
+    titles = raw['title'].to_numpy(dtype=object)
+    titles[::3] = [title.replace(' ', '\n', 1) for title in titles[::3]]
+    titles[1::4] = [f'"Senior" {title}' for title in titles[1::4]]
+    titles[2::5] = [f'{title}\n"(\n)"\n' for title in titles[2::5]]
+    raw['title'] = titles
+
+    buffer = io.StringIO(newline='')
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(raw.columns)
+    body, row_starts = buffer.getvalue().encode(), []
+    for row in raw.itertuples(index=False):
+        buffer = io.StringIO(newline='')
+        csv.writer(buffer, lineterminator='\n').writerow(row)
+        row_starts.append(len(body))
+        body += buffer.getvalue().encode()
+    path = directory / 'quoted.csv'
+    path.write_bytes(body)
+    return str(path), row_starts
+
+
+def as_strings(frame):
+    # Categories differ between ranges (their concat is plain strings), so compare the values
+    return frame.astype({col: 'str' for col in frame.columns
+                         if isinstance(frame[col].dtype, pd.CategoricalDtype)})
+
+
+@pytest.mark.parametrize('n_ranges', RANGE_COUNTS)
+def test_ranges_start_on_rows(quoted_csv, n_ranges):
+    csv_path, row_starts = quoted_csv
+    ranges = row_ranges(csv_path, n_ranges)
+    assert len(ranges) <= n_ranges
+    assert ranges[0][0] == row_starts[0]
+    assert all(end == start for (_, end), (start, _) in zip(ranges[:-1], ranges[1:]))
+    assert set(start for start, _ in ranges) <= set(row_starts)
+
+
+@pytest.mark.parametrize('n_ranges', RANGE_COUNTS)
+def test_ranges_read_back_the_whole_csv(quoted_csv, n_ranges):
+    csv_path, _ = quoted_csv
+    expected = read_source_csv(csv_path)
+    assert expected['title'].str.contains('\n').any()
+    actual = pd.concat([read_source_range(csv_path, start, end)
+                        for start, end in row_ranges(csv_path, n_ranges)], ignore_index=True)
+    pd.testing.assert_frame_equal(as_strings(actual), as_strings(expected))
+
+
+def test_parallel_aggregates_match_single_process(quoted_csv):
+    csv_path, _ = quoted_csv
+    expected, actual = build_aggregates(read_source_csv(csv_path)), parallel_aggregates(csv_path, 2)
+    pd.testing.assert_frame_equal(actual.daily_totals, expected.daily_totals, check_freq=False)
+    days = expected.daily_totals.index
+    rng = np.random.default_rng(0)
+    windows = [(expected.min_date, expected.max_date)]
+    for _ in range(3):
+        i, j = sorted(rng.integers(0, len(days), size=2))
+        windows.append((days[i].date(), days[j].date()))
+    problems = []
+    for window in windows:
+        left, right = dashboard_frames(expected, *window), dashboard_frames(actual, *window)
+        problems += [f'{window}: {problem}' for name in left
+                     for problem in compare_frames(name, left[name], right[name])]
+    assert problems == []
@@ -0,0 +1,76 @@
+"""Sketched salary quantiles against exact pandas quantiles.
+
+Runs on a small synthetic CSV from ``benchmarks.generate_data``. Its salaries
+include zeros, so the below-1 bucket is exercised too.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import SALARY_QUANTILES, build_aggregates, prepare_tech_jobs
+from benchmarks.bench_salary_sketch import exact_quantiles, max_relative_error
+from benchmarks.generate_data import generate
+from ingest import load_jobs
+from quantile_sketch import RELATIVE_ACCURACY, bucket_index, bucket_value, grouped_quantiles
+
+# Small slack for floating point at bucket boundaries
+BOUND = RELATIVE_ACCURACY * (1 + 1e-9)
+
+
+@pytest.fixture(scope='module')
+def jobs(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('sketch')
+    csv_path = str(directory / 'jobs.csv')
+    generate(csv_path, 10_000, seed=1)
+    df = load_jobs(csv_path, str(directory / 'cache'))
+    return build_aggregates(df), prepare_tech_jobs(df)
+
+
+def windows(days, n, seed=0):
+    rng = np.random.default_rng(seed)
+    yield days[0], days[-1]
+    for _ in range(n):
+        i, j = np.sort(rng.integers(0, len(days), size=2))
+        yield days[i], days[j]
+
+
+def test_sector_quantiles_within_error_bound(jobs):
+    store, tech_df = jobs
+    for start, end in windows(store.timeseries.index, 10):
+        end = end + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+        estimate = store.sector_salary_quantiles(start, end, SALARY_QUANTILES)
+        exact = exact_quantiles(tech_df, start, end, SALARY_QUANTILES)
+        # Every sector with salaries in the window has an estimate
+        assert estimate.reindex(exact.index).notna().to_numpy()[exact.notna().to_numpy()].all()
+        assert max_relative_error(estimate, exact) <= BOUND, (start, end)
+
+
+def test_bucket_value_within_relative_accuracy():
+    values = np.concatenate([np.logspace(0, 7, 5001), [1.0, 1.01, 2.5, 3000.0, 12345.67]])
+    error = np.abs(bucket_value(bucket_index(values)) - values) / values
+    assert error.max() <= BOUND
+
+
+def test_values_below_one_share_bucket_zero():
+    assert bucket_index([0.0, 0.25, 0.999]).tolist() == [0, 0, 0]
+    assert bucket_index([1.0]).tolist() == [1]
+    assert bucket_value([0]).tolist() == [0.0]
+    # A group of zeros has every quantile at 0
+    result = grouped_quantiles(np.zeros(1, dtype=np.int64), [0], [3], 1, (0.25, 0.5, 0.9))
+    assert result.tolist() == [[0.0, 0.0, 0.0]]
+
+
+def test_single_value():
+    value = 4200.0
+    result = grouped_quantiles(np.zeros(1, dtype=np.int64), bucket_index([value]), [1], 1, SALARY_QUANTILES)
+    assert np.all(np.abs(result - value) / value <= BOUND)
+
+
+def test_empty_groups_are_nan():
+    # Groups 0 and 2 have values, group 1 and 3 have none
+    buckets = bucket_index([1000.0, 2000.0, 5000.0])
+    result = grouped_quantiles(np.array([0, 0, 2]), buckets, [1, 1, 2], 4, (0.5,))
+    assert np.isnan(result[[1, 3], 0]).all()
+    assert abs(result[0, 0] - 1500.0) / 1500.0 <= BOUND
+    assert abs(result[2, 0] - 5000.0) / 5000.0 <= BOUND
+    assert np.isnan(grouped_quantiles(np.zeros(0, dtype=np.int64), [], [], 2, (0.5,))).all()